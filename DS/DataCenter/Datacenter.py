@@ -1,11 +1,19 @@
 import threading
+import queue
 import requests
 import time
 import uuid
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, abort
 from flask_socketio import SocketIO, emit
 import os
 
+try:
+    from .metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE
+    from .tracing import TRACER, HEADER as TRACE_HEADER, dump_args
+except ImportError:
+    from metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE
+    from tracing import TRACER, HEADER as TRACE_HEADER, dump_args
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
 STATIC_DIR = os.path.join(BASE_DIR, "static")
@@ -43,7 +51,8 @@ PACKAGE_ZONE = {
 # DATACENTER CLASS
 # -------------------------------
 class DataCenter:
-    def __init__(self, name, location, capacity_tb, utc_offset, datacenter_id, neighbors=None):
+    def __init__(self, name, location, capacity_tb, utc_offset, datacenter_id, neighbors=None,
+                 predecessors=None):
         self.name = name
         self.location = location
         self.capacity_tb = capacity_tb
@@ -52,9 +61,23 @@ class DataCenter:
         self.servers = []  # list of dicts {port, thread}
         self.is_operational = True
         self.neighbors = neighbors or []
+        self.predecessors = predecessors or []  # DCs that replicate to this one
         self.packages = {}  # in-memory package store
         self.app = None
         self.socketio = None
+        # One FIFO sender thread (with its own keep-alive Session) per neighbor, so
+        # every neighbor gets the events in the order this DC recorded/applied them
+        self._outboxes = {}  # neighbor URL -> queue.Queue, started on first use
+        self._outboxes_lock = threading.Lock()
+
+        labels = {"dc": name}
+        self._m_record = REGISTRY.histogram("dc_record_event_seconds", "Time to record a package event", labels)
+        self._m_replicate = REGISTRY.histogram("dc_replicate_seconds", "Time to apply an inbound replicated event", labels)
+        self._m_applied = REGISTRY.counter("dc_replicated_events_total", "Inbound replicated events",
+                                           {**labels, "result": "applied"})
+        self._m_skipped = REGISTRY.counter("dc_replicated_events_total", "Inbound replicated events",
+                                           {**labels, "result": "skipped"})
+        self._m_emit = REGISTRY.histogram("dc_socketio_emit_seconds", "Time spent in Socket.IO emits", labels)
 
     def get_status(self):
         return {
@@ -67,6 +90,7 @@ class DataCenter:
         }
 
     def _record_package_event(self, package_id, event):
+        t0 = time.perf_counter()
         now = time.time()
         zone = PACKAGE_ZONE.get(package_id, "Unknown")
         pkg = self.packages.setdefault(package_id, {
@@ -82,8 +106,54 @@ class DataCenter:
             pkg["current_location"] = event["location"]
         if "status" in event:
             pkg["status"] = event["status"]
+        elapsed = time.perf_counter() - t0
+        self._m_record.observe(elapsed)
+        if TRACER.enabled:
+            TRACER.record("dc.record_event", {"dc": self.name, "package_id": package_id}, elapsed)
         return event_record
 
+    def _emit(self, event, payload):
+        t0 = time.perf_counter()
+        self.socketio.emit(event, payload, namespace="/")
+        self._m_emit.observe(time.perf_counter() - t0)
+
+    def _outbox(self, neighbor):
+        outbox = self._outboxes.get(neighbor)
+        if outbox is None:
+            with self._outboxes_lock:
+                outbox = self._outboxes.get(neighbor)
+                if outbox is None:
+                    outbox = self._outboxes[neighbor] = queue.Queue()
+                    threading.Thread(target=self._replication_sender, args=(neighbor, outbox),
+                                     name=f"replicate-{self.datacenter_id}-{len(self._outboxes)}",
+                                     daemon=True).start()
+        return outbox
+
+    def _replicate_async(self, package_id, event_record):
+        trace_parent = TRACER.current()
+        for neighbor in self.neighbors:
+            self._outbox(neighbor).put((package_id, event_record, trace_parent))
+
+    def _replication_sender(self, neighbor, outbox):
+        session = requests.Session()
+        while True:
+            package_id, event_record, trace_parent = outbox.get()
+            self._replicate_event_to_neighbor(session, neighbor, package_id, event_record, trace_parent)
+
+    def _replicate_event_to_neighbor(self, session, neighbor, package_id, event_record, trace_parent=None):
+        # runs on the neighbor's sender thread: the caller passes its span as trace_parent
+        with TRACER.span("dc.replicate.send", {"dc": self.name, "neighbor": neighbor,
+                                               "package_id": package_id}, parent=trace_parent) as sp:
+            # always sent while tracing is on, so an unsampled trace stays unsampled downstream
+            headers = {TRACE_HEADER: sp.header()} if TRACER.enabled else None
+            try:
+                resp = session.post(f"{neighbor}/api/replicate", headers=headers,
+                                    json={"package_id": package_id, "event": event_record}, timeout=5)
+                sp.set("status", resp.status_code)
+            except requests.RequestException as e:
+                sp.set("error", type(e).__name__)
+                print(f"[!] {self.name}: replication to {neighbor} failed ({e})")
+
     def add_new_server(self, port=5000):
         app = Flask(self.name, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
         socketio = SocketIO(app, cors_allowed_origins="*", async_mode="threading")
@@ -100,6 +170,18 @@ class DataCenter:
         def status():
             return jsonify(dc.get_status())
 
+        @app.route("/metrics")
+        def metrics():
+            return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+        @app.route("/debug/traces")
+        def debug_traces():
+            try:
+                trace_id, limit = dump_args(request.args)
+            except ValueError:
+                return jsonify({"ok": False, "error": "bad trace or limit"}), 400
+            return jsonify(TRACER.dump(trace_id, limit))
+
         @app.route("/api/package/<package_id>/update", methods=["POST"])
         def package_update(package_id):
             data = request.get_json() or {}
@@ -111,43 +193,60 @@ class DataCenter:
             if "agent_id" in data:
                 event["agent_id"] = data["agent_id"]
 
-            event_record = dc._record_package_event(package_id, event)
+            with TRACER.span("dc.package_update", {"dc": dc.name, "package_id": package_id}):
+                event_record = dc._record_package_event(package_id, event)
 
-            # Broadcast to connected clients
-            socketio.emit("package_event", {"package_id": package_id, "event": event_record}, namespace="/")
+                # Broadcast to connected clients
+                dc._emit("package_event", {"package_id": package_id, "event": event_record})
 
-            # Replicate to neighbors
-            threading.Thread(target=dc._replicate_event_to_neighbors, args=(package_id, event_record), daemon=True).start()
+                # Replicate to neighbors
+                dc._replicate_async(package_id, event_record)
 
             return jsonify({"ok": True, "event": event_record})
 
         @app.route("/api/replicate", methods=["POST"])
         def replicate():
+            # Restrict access to the DCs that replicate to us (our predecessors on the ring)
+            allowed_hosts = [n.split("//")[-1].split(":")[0] for n in dc.predecessors]  # extract host
+            if request.remote_addr not in allowed_hosts and request.remote_addr != "127.0.0.1":
+                abort(403, description="Not allowed: only predecessors can replicate")
+
+            t0 = time.perf_counter()
             data = request.get_json() or {}
             package_id = data.get("package_id")
             event = data.get("event")
             if not package_id or not event:
                 return jsonify({"ok": False, "error": "missing package_id or event"}), 400
 
-            existing = dc.packages.get(package_id, {}).get("history", [])
-            if any(e.get("event_id") == event.get("event_id") for e in existing):
-                return jsonify({"ok": True, "skipped": True})
-
-            dc.packages.setdefault(package_id, {
-                "package_id": package_id,
-                "status": "unknown",
-                "current_location": None,
-                "zone": PACKAGE_ZONE.get(package_id, "Unknown"),
-                "history": []
-            })
-            dc.packages[package_id]["history"].append(event)
-            if "location" in event:
-                dc.packages[package_id]["current_location"] = event["location"]
-            if "status" in event:
-                dc.packages[package_id]["status"] = event["status"]
-
-            socketio.emit("package_event", {"package_id": package_id, "event": event}, namespace="/")
-            return jsonify({"ok": True})
+            with TRACER.span("dc.replicate.apply", {"dc": dc.name, "package_id": package_id},
+                             parent=TRACER.extract(request.headers)) as sp:
+                existing = dc.packages.get(package_id, {}).get("history", [])
+                if any(e.get("event_id") == event.get("event_id") for e in existing):
+                    dc._m_skipped.inc()
+                    dc._m_replicate.observe(time.perf_counter() - t0)
+                    sp.set("skipped", True)
+                    return jsonify({"ok": True, "skipped": True})
+
+                dc.packages.setdefault(package_id, {
+                    "package_id": package_id,
+                    "status": "unknown",
+                    "current_location": None,
+                    "zone": PACKAGE_ZONE.get(package_id, "Unknown"),
+                    "history": []
+                })
+                dc.packages[package_id]["history"].append(event)
+                if "location" in event:
+                    dc.packages[package_id]["current_location"] = event["location"]
+                if "status" in event:
+                    dc.packages[package_id]["status"] = event["status"]
+
+                dc._m_applied.inc()
+                dc._m_replicate.observe(time.perf_counter() - t0)
+                dc._emit("package_event", {"package_id": package_id, "event": event})
+
+                # Pass it on around the ring; it stops once it reaches a DC that already has it
+                dc._replicate_async(package_id, event)
+                return jsonify({"ok": True})
 
         @app.route("/api/package/<package_id>")
         def get_package(package_id):
@@ -167,44 +266,9 @@ class DataCenter:
         self.socketio = socketio
 
         def run_server():
-            socketio.run(app, host="127.0.0.1", port=port, debug=False)
+            socketio.run(app, host="127.0.0.1", port=port, debug=False, allow_unsafe_werkzeug=True)
 
         t = threading.Thread(target=run_server)
         t.start()
         self.servers.append({"port": port, "thread": t})
         print(f"[+] {self.name} running on port {port} with neighbors: {self.neighbors}")
-    
-        @app.route("/api/replicate", methods=["POST"])
-        def replicate():
-            # Restrict access to neighbors only
-            remote_addr = request.remote_addr
-            allowed_hosts = [n.split("//")[-1].split(":")[0] for n in dc.neighbors]  # extract host
-            if remote_addr not in allowed_hosts and remote_addr != "127.0.0.1":
-                # reject requests from non-neighbors
-                os.abort(403, description="Not allowed: only neighbors can replicate")
-
-            data = request.get_json() or {}
-            package_id = data.get("package_id")
-            event = data.get("event")
-            if not package_id or not event:
-                return jsonify({"ok": False, "error": "missing package_id or event"}), 400
-
-            existing = dc.packages.get(package_id, {}).get("history", [])
-            if any(e.get("event_id") == event.get("event_id") for e in existing):
-                return jsonify({"ok": True, "skipped": True})
-
-            dc.packages.setdefault(package_id, {
-                "package_id": package_id,
-                "status": "unknown",
-                "current_location": None,
-                "zone": PACKAGE_ZONE.get(package_id, "Unknown"),
-                "history": []
-            })
-            dc.packages[package_id]["history"].append(event)
-            if "location" in event:
-                dc.packages[package_id]["current_location"] = event["location"]
-            if "status" in event:
-                dc.packages[package_id]["status"] = event["status"]
-
-            dc.socketio.emit("package_event", {"package_id": package_id, "event": event}, namespace="/")
-            return jsonify({"ok": True})
\ No newline at end of file
@@ -0,0 +1,162 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Seconds; covers sub-millisecond in-process work up to multi-second requests
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# -------------------------------
+# METRIC TYPES
+# -------------------------------
+# Observations are plain attribute/list updates with no lock: a lock would
+# double their cost. Under the GIL an update can only be lost if a thread is
+# preempted in the middle of one, which is an acceptable error for monitoring.
+# Keep a reference to the metric object (e.g. at module level) instead of
+# looking it up in the registry on every observation.
+class Counter:
+    kind = "counter"
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self, name):
+        yield name, {}, self.value
+
+
+class Gauge:
+    kind = "gauge"
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def samples(self, name):
+        yield name, {}, self.value
+
+
+class Histogram:
+    """Fixed upper bounds chosen up front; observe() is one bisect plus two adds."""
+    kind = "histogram"
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)   # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def samples(self, name):
+        counts = list(self.counts)
+        total = self.sum
+        cumulative = 0
+        for bound, n in zip(self.bounds, counts):
+            cumulative += n
+            yield name + "_bucket", {"le": _fmt(bound)}, cumulative
+        cumulative += counts[-1]
+        yield name + "_bucket", {"le": "+Inf"}, cumulative
+        yield name + "_sum", {}, total
+        yield name + "_count", {}, cumulative
+
+
+class _Timer:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0)
+        return False
+
+
+# -------------------------------
+# REGISTRY
+# -------------------------------
+class Registry:
+    def __init__(self):
+        self._families = {}   # name -> {"kind", "help", "children": {labels tuple: metric}}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            fam = self._families.setdefault(name, {"kind": cls.kind, "help": help_text, "children": {}})
+            if fam["kind"] != cls.kind:
+                raise ValueError(f"metric {name} already registered as a {fam['kind']}")
+            metric = fam["children"].get(key)
+            if metric is None:
+                metric = fam["children"][key] = cls(**kwargs)
+            return metric
+
+    def counter(self, name, help_text="", labels=None):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text="", labels=None):
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text="", labels=None, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self):
+        """Everything registered, in the Prometheus text exposition format."""
+        with self._lock:
+            families = [(name, dict(fam, children=dict(fam["children"]))) for name, fam in self._families.items()]
+        lines = []
+        for name, fam in sorted(families):
+            if fam["help"]:
+                lines.append(f"# HELP {name} {fam['help']}")
+            lines.append(f"# TYPE {name} {fam['kind']}")
+            for key, metric in sorted(fam["children"].items()):
+                base = dict(key)
+                for sample, extra, value in metric.samples(name):
+                    lines.append(f"{sample}{_fmt_labels({**base, **extra})} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _fmt(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels.items():
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Process-wide default registry, served at /metrics
+REGISTRY = Registry()
@@ -0,0 +1,169 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import signal
+import time
+
+import requests
+
+try:
+    from .Datacenter import DataCenter
+except ImportError:
+    from Datacenter import DataCenter
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TOPOLOGY = os.path.join(BASE_DIR, "topology.json")
+
+
+# -------------------------------
+# TOPOLOGY
+# -------------------------------
+def load_topology(path=DEFAULT_TOPOLOGY):
+    """
+    Read the cluster description. Datacenters are listed in ring order; unless a
+    DC gives its own "neighbors", it replicates to the next one in the list.
+    A DC may set its own "host" (default: the top-level one). Each DC's
+    "predecessors" are filled in as the DCs that list it as a neighbor: they
+    are the ones allowed to call its /api/replicate.
+    """
+    with open(path) as f:
+        topo = json.load(f)
+    host = topo.setdefault("host", "127.0.0.1")
+    dcs = topo["datacenters"]
+    urls = {dc["name"]: f"http://{dc.get('host', host)}:{dc['port']}" for dc in dcs}
+    for i, dc in enumerate(dcs):
+        successor = dcs[(i + 1) % len(dcs)]
+        dc.setdefault("capacity_tb", 5000)
+        dc.setdefault("neighbors", [urls[successor["name"]]])
+    for dc in dcs:
+        dc.setdefault("predecessors", [urls[p["name"]] for p in dcs if urls[dc["name"]] in p["neighbors"]])
+    return topo
+
+
+def run_datacenter(spec):
+    """Child process entry point: one DataCenter, serving until killed."""
+    dc = DataCenter(spec["name"], spec["location"], spec["capacity_tb"], spec["utc_offset"],
+                    spec["datacenter_id"], neighbors=spec["neighbors"],
+                    predecessors=spec.get("predecessors"))
+    dc.add_new_server(port=spec["port"])
+    # Stay in the main thread while serving: once it returns the interpreter
+    # starts shutting down (and e.g. refuses new concurrent.futures work)
+    for server in dc.servers:
+        server["thread"].join()
+
+
+# -------------------------------
+# SUPERVISOR
+# -------------------------------
+class Supervisor:
+    """
+    Runs every DataCenter of a topology in its own process:
+      - all children are started at once, then probed on /status until ready
+      - a child that dies is restarted, with exponential backoff if it keeps dying
+    """
+    target = staticmethod(run_datacenter)   # child entry point, called with the DC's spec
+
+    def __init__(self, topology, ready_timeout=15.0, probe_interval=0.05,
+                 restart_backoff=0.5, max_backoff=10.0, stable_after=30.0):
+        self.topology = topology
+        self.host = topology["host"]
+        self.specs = {dc["name"]: dc for dc in topology["datacenters"]}
+        self.ready_timeout = ready_timeout
+        self.probe_interval = probe_interval
+        self.restart_backoff = restart_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.children = {}   # name -> {"proc", "started", "restarts", "backoff", "next_restart"}
+        self._http = requests.Session()
+
+    def status_url(self, name):
+        spec = self.specs[name]
+        return f"http://{spec.get('host', self.host)}:{spec['port']}/status"
+
+    def _spawn(self, name):
+        proc = mp.Process(target=self.target, args=(self.specs[name],), name=name, daemon=True)
+        proc.start()
+        child = self.children.setdefault(name, {"restarts": 0, "backoff": self.restart_backoff})
+        child.update(proc=proc, started=time.monotonic(), next_restart=None)
+        return proc
+
+    def is_ready(self, name):
+        try:
+            return self._http.get(self.status_url(name), timeout=0.5).ok
+        except requests.RequestException:
+            return False
+
+    def wait_ready(self, names=None, timeout=None):
+        """Probe /status until every DC answers; returns the names still not ready."""
+        pending = list(names or self.specs)
+        deadline = time.monotonic() + (self.ready_timeout if timeout is None else timeout)
+        while True:
+            pending = [n for n in pending if not self.is_ready(n)]
+            if not pending or time.monotonic() >= deadline:
+                return pending
+            time.sleep(self.probe_interval)
+
+    def start(self):
+        """Start the whole cluster in parallel; returns seconds until all DCs were ready."""
+        t0 = time.monotonic()
+        for name in self.specs:
+            self._spawn(name)
+        not_ready = self.wait_ready()
+        elapsed = time.monotonic() - t0
+        if not_ready:
+            print(f"[!] Not ready after {elapsed:.2f}s: {', '.join(not_ready)}")
+        else:
+            print(f"[+] All {len(self.specs)} datacenters ready in {elapsed:.2f}s")
+        return elapsed
+
+    def check_children(self):
+        """Restart any child that has exited; call this periodically."""
+        now = time.monotonic()
+        for name, child in self.children.items():
+            proc = child["proc"]
+            if proc.is_alive():
+                if now - child["started"] > self.stable_after:
+                    child["backoff"] = self.restart_backoff
+                continue
+            if child["next_restart"] is None:
+                child["next_restart"] = now + child["backoff"]
+                print(f"[!] {name} exited with code {proc.exitcode}; restarting in {child['backoff']:.1f}s")
+                continue
+            if now >= child["next_restart"]:
+                child["restarts"] += 1
+                child["backoff"] = min(child["backoff"] * 2, self.max_backoff)
+                self._spawn(name)
+                print(f"[+] Restarted {name} (restart #{child['restarts']})")
+
+    def monitor(self, interval=0.5):
+        while True:
+            self.check_children()
+            time.sleep(interval)
+
+    def stop(self):
+        for child in self.children.values():
+            if child["proc"].is_alive():
+                child["proc"].terminate()
+        for child in self.children.values():
+            child["proc"].join(timeout=5)
+
+
+def _stop_on_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run each DataCenter in its own process.")
+    parser.add_argument("--topology", default=DEFAULT_TOPOLOGY)
+    parser.add_argument("--ready-timeout", type=float, default=15.0)
+    args = parser.parse_args()
+
+    supervisor = Supervisor(load_topology(args.topology), ready_timeout=args.ready_timeout)
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    supervisor.start()
+    try:
+        supervisor.monitor()
+    except KeyboardInterrupt:
+        print("Shutting down datacenters...")
+        supervisor.stop()
@@ -0,0 +1,246 @@
+import itertools
+import os
+import random
+import time
+from contextvars import ContextVar
+
+# Outbound requests carry "<trace id>-<span id>-<sampled>" (hex ids, sampled 1/0) so the
+# receiver continues the trace, or keeps not sampling it: the decision is made once per trace
+HEADER = "X-Trace-Context"
+UNSAMPLED_HEADER = "0000000000000000-0000000000000000-0"
+
+_current = ContextVar("current_span", default=None)
+
+
+def _new_id():
+    return random.getrandbits(64) or 1
+
+
+# -------------------------------
+# SPANS
+# -------------------------------
+# Only sampled spans are Span objects. Everything else is a shared no-op
+# (tracing disabled, or inside an unsampled trace) or an _Unsampled marker
+# that keeps the "not sampled" decision for the spans nested under it.
+# Even the no-op costs a few hundred ns for the `with` statement, so hot
+# paths check `TRACER.enabled` first and use record() for leaf spans; the
+# `with TRACER.span(...)` form is for request-level work.
+class SpanContext:
+    __slots__ = ("trace_id", "span_id")
+
+    def __init__(self, trace_id, span_id):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+
+class Span:
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "attrs", "start_ns", "_t0", "_token")
+    sampled = True
+
+    def __init__(self, tracer, name, trace_id, parent_id, attrs):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = _new_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, key, value):
+        if self.attrs is None:
+            self.attrs = {}
+        self.attrs[key] = value
+
+    def header(self):
+        return f"{self.trace_id:016x}-{self.span_id:016x}-1"
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter_ns() - self._t0
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.set("error", exc_type.__name__)
+        self.tracer._store(self.trace_id, self.span_id, self.parent_id, self.name,
+                           self.start_ns, duration, self.attrs)
+        return False
+
+
+class _Noop:
+    __slots__ = ()
+    sampled = False
+    trace_id = None
+
+    def set(self, key, value):
+        pass
+
+    def header(self):
+        return UNSAMPLED_HEADER
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Unsampled(_Noop):
+    __slots__ = ("_token",)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _current.reset(self._token)
+        return False
+
+
+NOOP_SPAN = _Noop()
+
+
+# -------------------------------
+# TRACER
+# -------------------------------
+class Tracer:
+    """
+    Spans go into a preallocated ring buffer of `capacity` slots; the oldest are
+    overwritten. Like metric observations, stores take no lock (a slot index from
+    itertools.count is atomic under the GIL). sample_rate is the fraction of new
+    traces recorded; 0 disables tracing and span() returns NOOP_SPAN at once.
+    """
+
+    def __init__(self, capacity=4096, sample_rate=0.0):
+        self.configure(sample_rate, capacity)
+
+    def configure(self, sample_rate=None, capacity=None):
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be positive")
+        if sample_rate is not None and not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be in [0, 1]")
+        if capacity is not None:
+            self.capacity = capacity
+            self._buf = [None] * capacity
+            self._seq = itertools.count()
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+            self.enabled = sample_rate > 0.0
+
+    def span(self, name, attrs=None, parent=None):
+        """
+        Context manager for one span. The parent is the current span of this
+        thread/task unless given (a Span, SpanContext or extract() result, e.g.
+        when the work continues in another thread or process). A given parent
+        that is not sampled keeps everything under this span unsampled too.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        if parent is None:
+            parent = _current.get()
+            if parent is None:
+                if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                    return _Unsampled()
+                return Span(self, name, _new_id(), 0, attrs)
+            if parent.trace_id is None:
+                return NOOP_SPAN        # already inside an unsampled span
+        elif parent.trace_id is None:
+            return _Unsampled()         # carry the decision into this thread/request
+        return Span(self, name, parent.trace_id, parent.span_id, attrs)
+
+    def record(self, name, attrs=None, duration=0.0, parent=None):
+        """
+        Store a span that just finished, `duration` seconds long (e.g. reusing a
+        metric's timing), or a logical step with no duration. Parent and sampling
+        work as in span(). Meant for leaf spans on hot paths, behind
+        `if TRACER.enabled`. Returns its SpanContext so children can be recorded
+        under it, or None if not sampled.
+        """
+        if parent is None:
+            parent = _current.get()
+        if parent is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return None
+            trace_id, parent_id = _new_id(), 0
+        elif parent.trace_id is None:
+            return None
+        else:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        span_id = _new_id()
+        duration_ns = int(duration * 1e9)
+        self._store(trace_id, span_id, parent_id, name, time.time_ns() - duration_ns, duration_ns, attrs)
+        return SpanContext(trace_id, span_id)
+
+    def current(self):
+        """The active span (to hand to another thread as `parent`), or None."""
+        return _current.get() if self.enabled else None
+
+    def extract(self, headers):
+        """
+        SpanContext from an inbound HEADER value: the caller's span, an unsampled
+        context (trace_id None) if the caller's trace is not sampled, or None if
+        there is no usable header (a new trace then samples on its own).
+        """
+        if not self.enabled:
+            return None
+        value = headers.get(HEADER)
+        if not value:
+            return None
+        parts = value.split("-")
+        if len(parts) not in (2, 3):
+            return None
+        try:
+            trace_id, span_id = int(parts[0], 16), int(parts[1], 16)
+        except ValueError:
+            return None
+        if len(parts) == 3 and parts[2] == "0":
+            return SpanContext(None, None)
+        return SpanContext(trace_id, span_id)
+
+    def _store(self, trace_id, span_id, parent_id, name, start_ns, duration_ns, attrs):
+        seq = next(self._seq)
+        self._buf[seq % self.capacity] = (seq, trace_id, span_id, parent_id, name, start_ns, duration_ns, attrs)
+
+    def dump(self, trace_id=None, limit=None):
+        """Buffered spans, oldest first, as JSON-ready dicts (optionally one trace / the last `limit`)."""
+        records = sorted(rec for rec in list(self._buf) if rec is not None)
+        recorded = records[-1][0] + 1 if records else 0
+        if trace_id is not None:
+            records = [rec for rec in records if rec[1] == trace_id]
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "capacity": self.capacity,
+            "recorded": recorded,
+            "spans": [
+                {
+                    "trace_id": f"{tid:016x}",
+                    "span_id": f"{sid:016x}",
+                    "parent_id": f"{pid:016x}" if pid else None,
+                    "name": name,
+                    "start_unix_ns": start,
+                    "duration_us": round(dur / 1000, 3),
+                    "attrs": attrs or {},
+                }
+                for _, tid, sid, pid, name, start, dur, attrs in records
+            ],
+        }
+
+
+def dump_args(args):
+    """(trace_id, limit) from /debug/traces query parameters (?trace=<hex>&limit=<n>); ValueError if malformed."""
+    trace = args.get("trace")
+    limit = args.get("limit")
+    return (int(trace, 16) if trace else None), (int(limit) if limit else None)
+
+
+# Process-wide default tracer, served at /debug/traces.
+# TRACE_SAMPLE_RATE (0..1, default 0 = off) and TRACE_BUFFER (slots) configure it.
+TRACER = Tracer(
+    capacity=int(os.environ.get("TRACE_BUFFER", "4096")),
+    sample_rate=float(os.environ.get("TRACE_SAMPLE_RATE", "0")),
+)
@@ -1,9 +1,262 @@
+import asyncio
 import socket
+import struct
 import threading
 import json
 import time
+import ring_codec
+from ring_codec import RingMessage, WIRE_JSON, SUPPORTED_WIRES
+
+# Every frame on the ring is a 4-byte big-endian length followed by the body
+FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+HANDSHAKE_TIMEOUT = 2.0
+# Reserved key of the HELLO frame; only honoured as the first frame of a connection
+HELLO_KEY = "__ring_hello__"
+
+
+def frame_parts(parts):
+    return [FRAME_HEADER.pack(sum(len(p) for p in parts)), *parts]
+
+
+async def read_frame(reader):
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ring_codec.CodecError(f"frame of {length} bytes exceeds limit")
+    return await reader.readexactly(length)
+
 
 class DataCenterNode:
+    """
+    Ring node on asyncio:
+      - one persistent, pipelined connection to the successor (reconnects
+        with backoff when the successor goes away)
+      - length-prefixed frames, so messages of any size arrive whole
+      - any number of inbound peers served concurrently
+      - wire format (binary or JSON, see ring_codec) agreed per connection with
+        a HELLO exchange; RingMessage payloads are relayed without decoding
+    The event loop runs in a daemon thread, so start()/stop()/send_to_successor()
+    can be called from plain threaded code just like before.
+    """
+    def __init__(self, datacenter_id, port, successor_port, host="127.0.0.1", verbose=True,
+                 wires=SUPPORTED_WIRES):
+        self.datacenter_id = datacenter_id
+        self.host = host
+        self.port = port
+        self.successor_port = successor_port
+        self.packages = {}
+        self.running = True
+        self.verbose = verbose
+        self.wires = tuple(wires)          # formats we offer/accept, preferred first
+        self.successor_wire = WIRE_JSON    # what the current successor agreed to
+        self.loop = None
+        self._server = None
+        self._outbox = None
+        self._sender_task = None
+        self._successor_writer = None
+        self._peers = set()
+        self._ready = threading.Event()
+
+    def start(self, timeout=5.0):
+        """Start serving; returns True once listening, False if the port could not be bound."""
+        threading.Thread(target=self._run_loop, daemon=True).start()
+        if not self._ready.wait(timeout):
+            print(f"{self.datacenter_id}: Not listening after {timeout}s")
+            return False
+        return self._server is not None
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._start_async())
+        finally:
+            self._ready.set()
+        if self._server is None:
+            self.loop.close()
+            return
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    async def _start_async(self):
+        try:
+            self._server = await asyncio.start_server(self._serve_peer, self.host, self.port)
+        except OSError as e:
+            print(f"{self.datacenter_id}: Port {self.port} is already in use! {e}")
+            return
+        # port=0 asks the OS for an ephemeral port; remember the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        # only a node that is listening (and whose loop keeps running) takes messages
+        self._outbox = asyncio.Queue()
+        self._sender_task = asyncio.create_task(self._sender())
+        if self.verbose:
+            print(f"{self.datacenter_id} listening on port {self.port}")
+
+    # Serve one inbound peer; many of these run side by side
+    async def _serve_peer(self, reader, writer):
+        self._peers.add(writer)
+        first = True
+        try:
+            while self.running:
+                body = await read_frame(reader)
+                hello_allowed, first = first, False
+                try:
+                    msg = ring_codec.decode(body)
+                    if hello_allowed and isinstance(msg, dict) and HELLO_KEY in msg:
+                        wire = self._answer_hello(msg[HELLO_KEY])
+                        writer.writelines(frame_parts([ring_codec.encode_json({"wire": wire})]))
+                        continue
+                except ring_codec.CodecError as e:
+                    # drop just this frame; the ones behind it on the connection are fine
+                    print(f"{self.datacenter_id}: Received invalid frame ({e})")
+                    continue
+                try:
+                    self.handle_message(msg)
+                except Exception as e:
+                    print(f"{self.datacenter_id}: Handler error {e}")
+        except ring_codec.CodecError as e:
+            print(f"{self.datacenter_id}: {e}, dropping peer")
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass  # peer went away, or we are shutting down
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    # Wire format for a peer's HELLO offer (a list of format names)
+    def _answer_hello(self, offered):
+        if not isinstance(offered, list) or not all(isinstance(w, str) for w in offered):
+            raise ring_codec.CodecError(f"bad HELLO offer {offered!r}")
+        return ring_codec.choose_wire([w for w in offered if w in self.wires])
+
+    # Handle incoming messages (plain dicts, or RingMessage for binary traffic)
+    def handle_message(self, msg):
+        if self.verbose:
+            print(f"{self.datacenter_id} received: {msg}")
+        # Forward the message to successor if it is not the origin
+        if isinstance(msg, RingMessage):
+            if msg.origin != self.datacenter_id:
+                self.send_to_successor(msg.forwarded())
+        elif msg.get("origin") != self.datacenter_id:
+            self.send_to_successor(msg)
+
+    # Queue a message for the successor; safe to call from any thread.
+    # Encoding happens in the sender, once the successor's wire format is known.
+    def send_to_successor(self, msg):
+        if not self.running or self.loop is None or self._outbox is None:
+            print(f"{self.datacenter_id}: Failed to send to successor (node not running)")
+            return
+        try:
+            in_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self._outbox.put_nowait(msg)
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._outbox.put_nowait, msg)
+        except RuntimeError as e:   # the loop closed under us (node stopping)
+            print(f"{self.datacenter_id}: Failed to send to successor ({e})")
+
+    # Point the node at a new successor (e.g. after the old one crashed)
+    def set_successor(self, successor_port):
+        self.successor_port = successor_port
+        if self.loop is not None and self._successor_writer is not None:
+            self.loop.call_soon_threadsafe(self._successor_writer.close)
+
+    # Single writer task: keeps the successor connection open and pipelines frames.
+    # Delivery is best-effort: a batch whose write/drain fails is kept in `pending`
+    # and resent after the reconnect, but drain() returning only means the bytes
+    # reached our socket buffer, so frames in flight when the successor dies are
+    # lost (and a frame the old connection did deliver may arrive twice).
+    async def _sender(self):
+        writer = None
+        pending = []
+        backoff = 0.05
+        while self.running:
+            if not pending:
+                pending.append(await self._outbox.get())
+            # coalesce whatever else is queued into the same flush
+            while not self._outbox.empty():
+                pending.append(self._outbox.get_nowait())
+            if writer is None or writer.is_closing():
+                try:
+                    reader, writer = await asyncio.open_connection(self.host, self.successor_port)
+                    self._successor_writer = writer
+                    self.successor_wire = await self._negotiate(reader, writer)
+                    asyncio.create_task(self._watch_successor(reader, writer))
+                    backoff = 0.05
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError,
+                        ring_codec.CodecError) as e:
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+                    print(f"{self.datacenter_id}: Failed to connect to successor ({e}), retrying in {backoff:.2f}s")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 2.0)
+                    continue
+            frames, sendable = [], []
+            for msg in pending:
+                try:
+                    frames.extend(frame_parts(ring_codec.encode_parts(msg, self.successor_wire)))
+                except ring_codec.CodecError as e:
+                    # drop just this message; the sender must stay alive for the rest
+                    print(f"{self.datacenter_id}: Dropping message for successor: {e}")
+                    continue
+                sendable.append(msg)
+            pending[:] = sendable
+            try:
+                writer.writelines(frames)
+                await writer.drain()
+                pending.clear()
+            except (ConnectionError, OSError) as e:
+                print(f"{self.datacenter_id}: Failed to send to successor ({e}), "
+                      f"resending {len(pending)} message(s) after reconnect")
+                writer.close()
+                writer = None
+
+    # Offer our wire formats; the successor answers with the one it picked
+    async def _negotiate(self, reader, writer):
+        writer.writelines(frame_parts([ring_codec.encode_json({HELLO_KEY: list(self.wires)})]))
+        await writer.drain()
+        reply = ring_codec.decode(await asyncio.wait_for(read_frame(reader), HANDSHAKE_TIMEOUT))
+        wire = reply.get("wire") if isinstance(reply, dict) else None
+        return wire if isinstance(wire, str) and wire in self.wires else WIRE_JSON
+
+    # After the handshake the successor never writes back, so EOF here means it has gone away;
+    # closing our side makes the sender reconnect on the next frame
+    async def _watch_successor(self, reader, writer):
+        try:
+            await reader.read()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _shutdown(self):
+        for peer in list(self._peers):
+            peer.close()
+        if self._successor_writer is not None:
+            self._successor_writer.close()
+        if self._server is not None:
+            self._server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.stop()
+
+    # Simulate failure
+    def stop(self):
+        self.running = False
+        if self.loop is not None and self._server is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        print(f"{self.datacenter_id} stopped")
+
+
+class BlockingDataCenterNode:
+    """Original thread-per-node transport: one TCP connection per message."""
     def __init__(self, datacenter_id, port, successor_port):
         self.datacenter_id = datacenter_id
         self.port = port
@@ -7,6 +7,12 @@ from DS.DataCenter.Datacenter import DataCenter
 import json
 from ring import Ring
 from paxos import PaxosCluster
+from failure_detector import HeartbeatMonitor
+from netmodel import NetworkModel
+from sharded_paxos import ShardedPaxos
+from DS.DataCenter.metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from DS.DataCenter.tracing import TRACER, dump_args
+from DS.DataCenter.supervisor import DEFAULT_TOPOLOGY, load_topology
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -35,6 +41,7 @@ ID_TO_NAME = {
     7: "Australia Data Center",
 }
 NAME_BY_ID = ID_TO_NAME  # alias for clarity
+ID_BY_NAME = {name: nid for nid, name in ID_TO_NAME.items()}
 
 
 ports = {
@@ -73,7 +80,92 @@ ring = Ring(Datacenters)
 
 # ✅ FIX: use PaxosCluster (there is no class named 'Paxos')
 paxos_dc_names = [dc.name for dc in Datacenters_eq]
-paxos = PaxosCluster(paxos_dc_names)
+# Flexible Paxos: PAXOS_Q1/PAXOS_Q2 set the phase quorums (default: majority for both)
+paxos = PaxosCluster(
+    paxos_dc_names,
+    phase1_quorum=int(os.environ["PAXOS_Q1"]) if os.environ.get("PAXOS_Q1") else None,
+    phase2_quorum=int(os.environ["PAXOS_Q2"]) if os.environ.get("PAXOS_Q2") else None,
+)
+
+# --- Latency-aware leader placement ---
+# Link RTTs are seeded from each DC's location/utc_offset and refined via /api/net/observe.
+# LEADER_PLACEMENT=latency makes the ring elect the DC with the lowest expected commit
+# latency instead of the highest ID. PHASE1_SHARE is the fraction of commits that also
+# pay Phase 1 (0 = stable leader).
+net = NetworkModel.from_datacenters(Datacenters_eq)
+paxos.distance = net.rtt          # Phase 2 asks the nearest acceptors first
+PHASE1_SHARE = float(os.environ.get("PHASE1_SHARE", "0"))
+
+def _latency_rank(nid: int) -> tuple:
+    """Lower expected commit latency ranks higher; ties go to the cheaper Phase 1."""
+    est = net.estimate(NAME_BY_ID[nid], paxos, PHASE1_SHARE)
+    if est["expected_s"] is None:
+        return (-float("inf"), -float("inf"))
+    return (-est["expected_s"], -est["phase1_s"])
+
+def set_placement(mode: str):
+    ring.rank = _latency_rank if mode == "latency" else None
+
+def best_leader_id():
+    """The node a latency-placement election picks: the same (rank, id) key as Ring._key."""
+    live = [i for i in ring.order if ring.nodes[i].alive]
+    best = max(live, key=lambda i: (_latency_rank(i), i), default=None)
+    if best is None or _latency_rank(best)[0] == -float("inf"):
+        return None
+    return best
+
+set_placement(os.environ.get("LEADER_PLACEMENT", "id"))
+
+# --- Sharded Paxos: PAXOS_SHARDS=N runs N independent groups, one worker process each ---
+# Commands are routed by key (package id / zone); DC crash/recover applies to every group.
+# The worker processes are started in __main__.
+PAXOS_SHARDS = int(os.environ.get("PAXOS_SHARDS", "0"))
+shards = ShardedPaxos(
+    paxos_dc_names,
+    groups=PAXOS_SHARDS,
+    phase1_quorum=paxos.phase1_quorum,
+    phase2_quorum=paxos.phase2_quorum,
+) if PAXOS_SHARDS > 0 else None
+
+# Membership changes (routes and failure detector) and propose/election all touch
+# ring, paxos and shards together; they run under this lock, one at a time.
+cluster_lock = threading.RLock()
+
+# --- Failure detector: heartbeats each DC's /status and drives crash/recover ---
+# Enable with FAILURE_DETECTOR=1 once the DCs are running (e.g. DS/DataCenter/supervisor.py).
+# Targets come from the same topology the supervisor starts (DC_TOPOLOGY overrides the path).
+topology = load_topology(os.environ.get("DC_TOPOLOGY", DEFAULT_TOPOLOGY))
+
+def _on_dc_down(nid: int):
+    with cluster_lock:
+        ring.crash(nid)
+        paxos.crash(NAME_BY_ID[nid])
+        if shards:
+            shards.crash(NAME_BY_ID[nid])
+        print(f"[failure-detector] {NAME_BY_ID[nid]} suspected down")
+        if ring.leader_id is None:
+            ring.start_fast()          # lost the leader: elect a new one right away
+
+def _on_dc_up(nid: int):
+    with cluster_lock:
+        ring.recover(nid)
+        paxos.recover(NAME_BY_ID[nid])
+        if shards:
+            shards.recover(NAME_BY_ID[nid])
+        print(f"[failure-detector] {NAME_BY_ID[nid]} is back")
+        if ring.leader_id is None:
+            ring.start_fast()
+
+monitor = HeartbeatMonitor(
+    {
+        dc["datacenter_id"]: f"http://{topology['host']}:{dc['port']}/status"
+        for dc in topology["datacenters"] if dc["datacenter_id"] in NAME_BY_ID
+    },
+    on_down=_on_dc_down,
+    on_up=_on_dc_up,
+    interval=float(os.environ.get("HEARTBEAT_INTERVAL", "0.5")),
+    threshold=float(os.environ.get("PHI_THRESHOLD", "8")),
+)
 
 def _sse(data: dict) -> str:
     return f"data: {json.dumps(data, separators=(',',':'))}\n\n"
@@ -83,6 +175,23 @@ def _sse(data: dict) -> str:
 def index():
     return render_template("indexer2.html")  # make sure templates/indexer2.html exists
 
+# ------------ Metrics ------------
+@app.route("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route("/debug/traces")
+def debug_traces():
+    try:
+        trace_id, limit = dump_args(request.args)
+    except ValueError:
+        return jsonify({"ok": False, "error": "bad trace or limit"}), 400
+    return jsonify(TRACER.dump(trace_id, limit))
+
+@app.route("/api/fd/state")
+def fd_state():
+    return jsonify(monitor.state())
+
 # ------------ Ring APIs ------------
 @app.route("/api/ring/state")
 def ring_state():
@@ -90,31 +199,64 @@ def ring_state():
 
 @app.route("/api/ring/reset", methods=["POST"])
 def ring_reset():
-    ring.reset_flags()
+    with cluster_lock:
+        ring.reset_flags()
     return jsonify({"ok": True, **ring.state()})
 
 @app.post("/api/ring/crash/<int:nid>")
 def ring_crash(nid):
-    ok = ring.crash(nid)
     name = {1:"Asia Data Center",2:"Europe Data Center",3:"Africa Data Center",
             4:"North America Data Center",5:"South America Data Center",
             6:"Atlantic Data Center",7:"Australia Data Center"}[nid]
-    paxos.crash(name)
+    with cluster_lock:
+        ok = ring.crash(nid)
+        paxos.crash(name)
+        if shards:
+            shards.crash(name)
     return jsonify({"ok": ok, **ring.state(), "paxos": paxos.state()})
 
 @app.route("/api/ring/recover/<int:nid>", methods=["POST"])
 def ring_recover(nid: int):
-    ok = ring.recover(nid)
-    # reflect the same DC recovery in Paxos
-    name = NAME_BY_ID.get(nid)
-    if name:
-        paxos.recover(name)
+    with cluster_lock:
+        ok = ring.recover(nid)
+        # reflect the same DC recovery in Paxos
+        name = NAME_BY_ID.get(nid)
+        if name:
+            paxos.recover(name)
+            if shards:
+                shards.recover(name)
     return jsonify({"ok": ok, **ring.state(), "paxos": paxos.state()})
 
+@app.route("/api/ring/placement", methods=["POST"])
+def ring_placement():
+    body = request.get_json(silent=True) or {}
+    mode = body.get("mode", "latency")
+    if mode not in ("id", "latency"):
+        return jsonify({"ok": False, "reason": "mode must be 'id' or 'latency'"}), 400
+    with cluster_lock:
+        set_placement(mode)
+        # switching to latency placement hands leadership straight to the best node
+        if mode == "latency" and body.get("handover", True):
+            lid = best_leader_id()
+            if lid is not None:
+                ring.handover(lid)
+    return jsonify({"ok": True, "mode": mode, **ring.state()})
+
+@app.route("/api/ring/handover", methods=["POST"])
+def ring_handover():
+    target = (request.get_json(silent=True) or {}).get("to")
+    if target is not None and (isinstance(target, bool) or not isinstance(target, int) or target not in ring.nodes):
+        return jsonify({"ok": False, "reason": "'to' must be a known node id"}), 400
+    with cluster_lock:
+        target = best_leader_id() if target is None else target
+        ok = target is not None and ring.handover(target)
+    return jsonify({"ok": ok, **ring.state()})
+
 @app.route("/api/ring/fast", methods=["POST"])
 def ring_fast():
     initiator = (request.get_json(silent=True) or {}).get("initiator")
-    res = ring.start_fast(initiator)
+    with cluster_lock:
+        res = ring.start_fast(initiator)
     return jsonify(res | ring.state())
 
 @app.route("/api/ring/trace")
@@ -126,7 +268,8 @@ def ring_trace_json():
 def ring_election_sse():
     initiator = request.args.get("initiator", type=int)
     delay = request.args.get("delay", default=400, type=int)
-    trace = ring.election_trace(initiator)
+    with cluster_lock:
+        trace = ring.election_trace(initiator)
 
     def gen():
         if not trace.get("ok"):
@@ -138,10 +281,11 @@ def ring_election_sse():
                 time.sleep(max(0, delay) / 1000)
         # commit final state
         leader = trace["leaderId"]
-        ring.leader_id = leader
-        for nd in ring.nodes.values():
-            nd.elected = leader
-            nd.participant = False
+        with cluster_lock:
+            ring.leader_id = leader
+            for nd in ring.nodes.values():
+                nd.elected = leader
+                nd.participant = False
 
     resp = Response(gen(), mimetype="text/event-stream")
     resp.headers["Cache-Control"] = "no-cache"
@@ -149,6 +293,30 @@ def ring_election_sse():
     resp.headers["Connection"] = "keep-alive"
     return resp
 
+# ------------ Network model APIs ------------
+@app.route("/api/net/model")
+def net_model():
+    estimates = [
+        {"id": nid, **net.estimate(NAME_BY_ID[nid], paxos, PHASE1_SHARE)}
+        for nid in ring.order if ring.nodes[nid].alive
+    ]
+    return jsonify({
+        "placement": "latency" if ring.rank else "id",
+        "phase1Share": PHASE1_SHARE,
+        "bestLeaderId": best_leader_id(),
+        "estimates": estimates,
+        **net.matrix(),
+    })
+
+@app.route("/api/net/observe", methods=["POST"])
+def net_observe():
+    body = request.get_json(silent=True) or {}
+    a, b, rtt_ms = body.get("a"), body.get("b"), body.get("rttMs")
+    if a not in net.coords or b not in net.coords or not isinstance(rtt_ms, (int, float)):
+        return jsonify({"ok": False, "reason": "need known 'a', 'b' and numeric 'rttMs'"}), 400
+    net.observe(a, b, rtt_ms / 1000.0)
+    return jsonify({"ok": True, "rttMs": round(net.rtt(a, b) * 1000, 2)})
+
 # ------------ Paxos APIs ------------
 @app.route("/api/paxos/state")
 def paxos_state():
@@ -156,6 +324,11 @@ def paxos_state():
 
 @app.route("/api/paxos/propose", methods=["POST"])
 def paxos_propose():
+    # one trace per request: any election it triggers plus the Paxos phases
+    with TRACER.span("api.paxos.propose"), cluster_lock:
+        return _paxos_propose()
+
+def _paxos_propose():
     cmd = (request.get_json(silent=True) or {}).get("command")
     cmd = (cmd or "").strip() or "NOOP"
 
@@ -173,8 +346,9 @@ def paxos_propose():
         6:"Atlantic Data Center", 7:"Australia Data Center",
     }.get(lid, f"node-{lid}")
 
-    # 2) Run Paxos; result depends on majority of alive acceptors
-    res = paxos.propose(cmd)
+    # 2) Run Paxos; result depends on the phase quorums of alive acceptors.
+    #    A leader that already won Phase 1 goes straight to Phase 2.
+    res = paxos.propose(cmd, proposer=proposer_name)
 
     return jsonify({
         "proposerId": lid,
@@ -186,11 +360,47 @@ def paxos_propose():
 
 @app.route("/api/paxos/crash/<name>", methods=["POST"])
 def paxos_crash(name: str):
-    return jsonify({"ok": paxos.crash(name)} | paxos.state())
+    with cluster_lock:
+        ok = paxos.crash(name)
+    return jsonify({"ok": ok} | paxos.state())
 
 @app.route("/api/paxos/recover/<name>", methods=["POST"])
 def paxos_recover(name: str):
-    return jsonify({"ok": paxos.recover(name)} | paxos.state())
+    with cluster_lock:
+        ok = paxos.recover(name)
+    return jsonify({"ok": ok} | paxos.state())
+
+# ------------ Sharded Paxos APIs ------------
+@app.route("/api/shards/state")
+def shards_state():
+    if shards is None:
+        return jsonify({"ok": False, "reason": "sharding-disabled"}), 404
+    return jsonify(shards.state())
+
+@app.route("/api/shards/propose", methods=["POST"])
+def shards_propose():
+    if shards is None:
+        return jsonify({"ok": False, "reason": "sharding-disabled"}), 404
+    body = request.get_json(silent=True)
+    # {"key": ..., "command": ...} or {"commands": [{"key": ..., "command": ...}, ...]}
+    items = body.get("commands", [body]) if isinstance(body, dict) else None
+    if not (isinstance(items, list) and items and all(
+            isinstance(it, dict) and isinstance(it.get("key"), str) and isinstance(it.get("command"), str)
+            for it in items)):
+        return jsonify({"ok": False, "reason": "need {key, command} strings, or a non-empty 'commands' list of them"}), 400
+    pairs = [(it["key"], it["command"].strip() or "NOOP") for it in items]
+    results = shards.propose_many(pairs)
+    return jsonify({"results": results, "commitVector": shards.commit_vector()})
+
+@app.route("/api/shards/log")
+def shards_log():
+    if shards is None:
+        return jsonify({"ok": False, "reason": "sharding-disabled"}), 404
+    return jsonify({"commitVector": shards.commit_vector(), "entries": shards.merged_log()})
 
 if __name__ == "__main__":
+    if shards:
+        shards.start()
+    if os.environ.get("FAILURE_DETECTOR") == "1":
+        monitor.start()
     app.run(debug=False, threaded=True, use_reloader=False)
@@ -0,0 +1,17 @@
+"""
+Benchmarks for the ring transport, wire codec and DataCenter replication.
+
+Run from the repository root, e.g. ``python -m benchmarks.ring_bench --help``.
+Every script prints a summary and, with ``--json PATH``, writes a result
+document (benchmark name, host info, parameters, results) for tracking
+regressions between runs.
+
+    codec_bench        ring_codec encode/decode/forward microbenchmarks
+    ring_bench         raw TCP ring (Datacenter.DataCenterNode) throughput/latency
+    replication_bench  HTTP replication ring (DS/DataCenter) throughput/latency
+    launcher_bench     threaded launcher vs. per-process supervisor: startup and throughput
+    metrics_bench      per-observation cost of DS/DataCenter/metrics.py
+    fd_bench           phi-accrual failure detector: detection time vs. false positives
+    sharded_paxos_bench  multi-group Paxos commit throughput vs. number of groups
+    tracing_bench      per-span cost of DS/DataCenter/tracing.py (disabled, unsampled, sampled)
+"""
@@ -0,0 +1,77 @@
+"""
+Encode/decode microbenchmarks for ring_codec.
+
+    python -m benchmarks.codec_bench [--sizes 64,1024,65536] [--json out.json]
+
+For each payload size it times, per message:
+  - encode / decode of a RingMessage in the binary and JSON formats
+  - a forwarding hop: decode the frame, bump hops, re-encode for the successor
+    (binary relays the payload as a memoryview; JSON has to loads+dumps it)
+"""
+from __future__ import annotations
+import argparse
+import os
+import timeit
+
+from benchmarks.common import write_results
+
+import ring_codec  # noqa: E402
+from ring_codec import RingMessage  # noqa: E402
+
+
+def _per_op_ns(fn, min_time=0.2) -> float:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    while True:
+        best = min(timer.repeat(repeat=3, number=number))
+        if best >= min_time or number > 10_000_000:
+            return best / number * 1e9
+        number *= 2
+
+
+def bench_size(size: int) -> dict:
+    msg = RingMessage(origin=3, type=ring_codec.MSG_DATA, seq=42, hops=1, payload=os.urandom(size))
+    binary = ring_codec.encode_binary(msg)
+    as_json = ring_codec.encode_json(msg)
+
+    def forward_binary():
+        m = ring_codec.decode(binary)
+        return ring_codec.encode_parts(m.forwarded(), ring_codec.WIRE_BINARY)
+
+    def forward_json():
+        m = ring_codec.decode(as_json)
+        return ring_codec.encode_parts(m.forwarded(), ring_codec.WIRE_JSON)
+
+    return {
+        "payload_bytes": size,
+        "frame_bytes": {"binary": len(binary), "json": len(as_json)},
+        "ns_per_op": {
+            "encode_binary": _per_op_ns(lambda: ring_codec.encode_binary_parts(msg)),
+            "decode_binary": _per_op_ns(lambda: ring_codec.decode(binary)),
+            "encode_json": _per_op_ns(lambda: ring_codec.encode_json(msg)),
+            "decode_json": _per_op_ns(lambda: ring_codec.decode(as_json)),
+            "forward_binary": _per_op_ns(forward_binary),
+            "forward_json": _per_op_ns(forward_json),
+        },
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="64,1024,65536", help="comma-separated payload sizes in bytes")
+    ap.add_argument("--json", dest="json_out", help="write results to this file")
+    args = ap.parse_args(argv)
+
+    results = [bench_size(int(s)) for s in args.sizes.split(",")]
+    for r in results:
+        ns = r["ns_per_op"]
+        print(f"payload {r['payload_bytes']:>7} B  frame bin/json {r['frame_bytes']['binary']}/{r['frame_bytes']['json']} B")
+        for k, v in ns.items():
+            print(f"    {k:<15} {v:>12.0f} ns")
+        print(f"    forward speedup {ns['forward_json'] / ns['forward_binary']:.1f}x")
+
+    return write_results(args.json_out, "codec", vars(args), {"sizes": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Helpers shared by the benchmark scripts: ports, process stats, percentiles, JSON output."""
+from __future__ import annotations
+import json
+import os
+import platform
+import resource
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    """Ask the OS for an unused ephemeral port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def rss_kb() -> int:
+    """Current resident set size of this process (peak RSS where /proc is missing)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def cpu_seconds() -> float:
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_utime + ru.ru_stime
+
+
+class ProcStats:
+    """CPU time and RSS of the current process since construction."""
+    def __init__(self):
+        self.cpu0 = cpu_seconds()
+        self.t0 = time.monotonic()
+
+    def snapshot(self) -> dict:
+        wall = time.monotonic() - self.t0
+        cpu = cpu_seconds() - self.cpu0
+        return {
+            "cpu_s": round(cpu, 4),
+            "cpu_pct": round(100 * cpu / wall, 1) if wall > 0 else 0.0,
+            "rss_kb": rss_kb(),
+        }
+
+
+def percentiles(samples: List[float], ps=(50, 90, 99, 99.9)) -> Dict[str, Optional[float]]:
+    """Nearest-rank percentiles, plus min/max/mean; all None for no samples."""
+    keys = ["min", "mean", "max"] + [f"p{p:g}" for p in ps]
+    if not samples:
+        return {k: None for k in keys}
+    xs = sorted(samples)
+    out = {"min": xs[0], "mean": sum(xs) / len(xs), "max": xs[-1]}
+    for p in ps:
+        rank = max(0, min(len(xs) - 1, int(round(p / 100 * len(xs) + 0.5)) - 1))
+        out[f"p{p:g}"] = xs[rank]
+    return out
+
+
+def paced(count: int, rate: float):
+    """Yield 0..count-1, sleeping so iterations happen at `rate` per second (0 = flat out)."""
+    interval = 1.0 / rate if rate > 0 else 0.0
+    start = time.monotonic()
+    for i in range(count):
+        if interval:
+            delay = start + i * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        yield i
+
+
+def write_results(path: Optional[str], benchmark: str, params: dict, results: dict) -> dict:
+    doc = {
+        "benchmark": benchmark,
+        "timestamp": time.time(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": params,
+        "results": results,
+    }
+    if path:
+        with open(path, "w") as f:
+            json.dump(doc, f, indent=2)
+        print(f"results written to {path}")
+    return doc
+
+
+def ms(x: Optional[float]) -> str:
+    return "-" if x is None else f"{x * 1000:.2f}ms"
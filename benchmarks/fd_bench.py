@@ -0,0 +1,132 @@
+"""
+Phi-accrual failure detector: detection time vs. false positives.
+
+    python -m benchmarks.fd_bench --healthy 8 --interval 0.1 --json fd.json
+
+The stand-in network is a local HTTP server whose /status handler sleeps for
+latency + N(0, jitter) seconds (and optionally drops a fraction of probes) before
+answering. For each latency/jitter profile a HeartbeatMonitor probes it for
+--healthy seconds, then the server is shut down to simulate a crash. phi is
+sampled every few milliseconds throughout, so every threshold in --thresholds
+is scored against the same heartbeat stream:
+
+  false_positives  upward crossings of the threshold while the server was healthy
+  detection_s      time from the crash until phi first reached the threshold
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.common import write_results
+from failure_detector import HeartbeatMonitor
+
+
+class _StandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float, jitter: float, drop: float, seed: int):
+        self.latency, self.jitter, self.drop = latency, jitter, drop
+        self.rng = random.Random(seed)
+        super().__init__(("127.0.0.1", 0), _StatusHandler)
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        srv = self.server
+        if srv.rng.random() < srv.drop:
+            time.sleep(60)  # lost probe: the monitor's timeout fires first
+            return
+        time.sleep(max(0.0, srv.latency + srv.rng.gauss(0.0, srv.jitter)))
+        body = json.dumps({"is_operational": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_profile(latency, jitter, drop, args) -> dict:
+    server = _StandIn(latency, jitter, drop, args.seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/status"
+    monitor = HeartbeatMonitor({1: url}, on_down=lambda nid: None, on_up=lambda nid: None,
+                               interval=args.interval, timeout=args.probe_timeout,
+                               threshold=float("inf"), min_std=args.min_std)
+    monitor.start()
+
+    samples = []   # (t, phi)
+    t0 = time.monotonic()
+    crash_at = t0 + args.healthy
+    end_at = crash_at + args.max_detect
+    crashed = False
+    while True:
+        now = time.monotonic()
+        if not crashed and now >= crash_at:
+            server.shutdown()
+            server.server_close()
+            crashed = True
+        if now >= end_at:
+            break
+        samples.append((now, monitor.phi(1, now)))
+        time.sleep(args.sample)
+    monitor.stop()
+
+    scores = {}
+    for th in args.thresholds:
+        fps, above = 0, False
+        detect = None
+        for t, phi in samples:
+            if t < crash_at:
+                if phi >= th and not above:
+                    fps += 1
+                above = phi >= th
+            elif phi >= th:
+                detect = t - crash_at
+                break
+        scores[f"{th:g}"] = {
+            "false_positives": fps,
+            "false_positives_per_min": round(fps * 60 / args.healthy, 2),
+            "detection_s": None if detect is None else round(detect, 3),
+        }
+    return {"latency_s": latency, "jitter_s": jitter, "drop": drop, "thresholds": scores}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--profiles", default="0.002:0.001:0,0.02:0.01:0,0.05:0.04:0.02",
+                    help="comma-separated latency:jitter:drop triples (seconds, seconds, fraction)")
+    ap.add_argument("--thresholds", default="1,2,3,5,8,12",
+                    type=lambda s: [float(x) for x in s.split(",")])
+    ap.add_argument("--interval", type=float, default=0.1, help="heartbeat interval (s)")
+    ap.add_argument("--probe-timeout", type=float, default=0.5)
+    ap.add_argument("--min-std", type=float, default=0.05)
+    ap.add_argument("--healthy", type=float, default=8.0, help="seconds of healthy operation per profile")
+    ap.add_argument("--max-detect", type=float, default=5.0, help="seconds to wait for detection after the crash")
+    ap.add_argument("--sample", type=float, default=0.005, help="phi sampling period (s)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", dest="json_out", help="write results to this file")
+    args = ap.parse_args(argv)
+
+    results = []
+    for prof in args.profiles.split(","):
+        latency, jitter, drop = (float(x) for x in prof.split(":"))
+        r = run_profile(latency, jitter, drop, args)
+        results.append(r)
+        print(f"latency {latency * 1000:.0f}ms  jitter {jitter * 1000:.0f}ms  drop {drop:.0%}")
+        for th, sc in r["thresholds"].items():
+            det = "-" if sc["detection_s"] is None else f"{sc['detection_s'] * 1000:.0f}ms"
+            print(f"    phi>={th:<4}  detect {det:>7}  false positives {sc['false_positives']} "
+                  f"({sc['false_positives_per_min']}/min)")
+    params = {k: v for k, v in vars(args).items()}
+    return write_results(args.json_out, "failure_detector", params, {"profiles": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Threaded launcher vs. per-process supervisor for the DS/DataCenter cluster.
+
+    python -m benchmarks.launcher_bench --duration 5 --clients 2 --json launch.json
+
+For each launcher it measures:
+  - startup: from launch until every DC answers /status
+  - aggregate throughput: package updates/sec completed across all DCs while
+    --clients threads per DC post updates for --duration seconds (each update
+    is also replicated around the ring)
+
+"threaded" reproduces app.py: every DC is a thread of one process, started
+0.3s apart. "supervisor" is DS/DataCenter/supervisor.py: one process per DC,
+started together and probed for readiness.
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+
+import requests
+
+from benchmarks.common import free_port, write_results
+from DS.DataCenter.supervisor import DEFAULT_TOPOLOGY, Supervisor, load_topology
+
+
+def _bench_topology() -> dict:
+    topo = load_topology(DEFAULT_TOPOLOGY)
+    for dc in topo["datacenters"]:
+        dc["port"] = free_port()
+    for i, dc in enumerate(topo["datacenters"]):
+        successor = topo["datacenters"][(i + 1) % len(topo["datacenters"])]
+        dc["neighbors"] = [f"http://{topo['host']}:{successor['port']}"]
+    return topo
+
+
+def _quiet():
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+
+def _threaded_cluster(topology):
+    """app.py's launch sequence, in a child process so it can be torn down."""
+    from DS.DataCenter.Datacenter import DataCenter
+    _quiet()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for spec in topology["datacenters"]:
+            dc = DataCenter(spec["name"], spec["location"], spec["capacity_tb"], spec["utc_offset"],
+                            spec["datacenter_id"], neighbors=spec["neighbors"])
+            threading.Thread(target=dc.add_new_server, kwargs={"port": spec["port"]}).start()
+            time.sleep(0.3)  # stagger startup, as app.py does
+        while True:
+            time.sleep(1)
+
+
+def _quiet_datacenter(spec):
+    from DS.DataCenter.supervisor import run_datacenter
+    _quiet()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        run_datacenter(spec)
+
+
+class QuietSupervisor(Supervisor):
+    target = staticmethod(_quiet_datacenter)
+
+
+def _load(topology, duration: float, clients: int) -> dict:
+    counts = []
+    errors = []
+    stop_at = time.monotonic() + duration
+
+    def client(url, k):
+        http = requests.Session()
+        ok = err = 0
+        i = 0
+        while time.monotonic() < stop_at:
+            try:
+                r = http.post(f"{url}/api/package/PKG-LOAD-{k}-{i % 5}/update",
+                              json={"location": f"step-{i}", "status": "in_transit"}, timeout=5)
+                ok += r.ok
+                err += not r.ok
+            except requests.RequestException:
+                err += 1
+            i += 1
+        counts.append(ok)
+        errors.append(err)
+
+    threads = []
+    for spec in topology["datacenters"]:
+        url = f"http://{topology['host']}:{spec['port']}"
+        for c in range(clients):
+            threads.append(threading.Thread(target=client, args=(url, f"{spec['datacenter_id']}-{c}")))
+    t0 = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t0
+    return {"updates": sum(counts), "errors": sum(errors), "elapsed_s": round(elapsed, 3),
+            "updates_per_s": round(sum(counts) / elapsed, 1)}
+
+
+def bench_threaded(args) -> dict:
+    topo = _bench_topology()
+    probe = Supervisor(topo, ready_timeout=args.ready_timeout)
+    t0 = time.monotonic()
+    proc = mp.Process(target=_threaded_cluster, args=(topo,), daemon=True)
+    proc.start()
+    not_ready = probe.wait_ready()
+    startup = time.monotonic() - t0
+    try:
+        load = _load(topo, args.duration, args.clients) if not not_ready else None
+    finally:
+        proc.terminate()
+        proc.join(timeout=5)
+    return {"startup_s": round(startup, 3), "not_ready": not_ready, "load": load}
+
+
+def bench_supervisor(args) -> dict:
+    topo = _bench_topology()
+    sup = QuietSupervisor(topo, ready_timeout=args.ready_timeout)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        startup = sup.start()
+    not_ready = sup.wait_ready(timeout=0)
+    try:
+        load = _load(topo, args.duration, args.clients) if not not_ready else None
+    finally:
+        sup.stop()
+    return {"startup_s": round(startup, 3), "not_ready": not_ready, "load": load}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--duration", type=float, default=5.0, help="seconds of load per launcher")
+    ap.add_argument("--clients", type=int, default=2, help="client threads per DC")
+    ap.add_argument("--ready-timeout", type=float, default=20.0)
+    ap.add_argument("--json", dest="json_out", help="write results to this file")
+    args = ap.parse_args(argv)
+
+    res = {"threaded": bench_threaded(args), "supervisor": bench_supervisor(args)}
+    for name, r in res.items():
+        load = r["load"] or {}
+        print(f"{name:<10} startup {r['startup_s']:.2f}s  "
+              f"throughput {load.get('updates_per_s', '-')} updates/s  errors {load.get('errors', '-')}"
+              + (f"  NOT READY: {r['not_ready']}" if r["not_ready"] else ""))
+    return write_results(args.json_out, "launcher", vars(args), res)
+
+
+if __name__ == "__main__":
+    main()
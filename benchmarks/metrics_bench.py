@@ -0,0 +1,58 @@
+"""
+Per-observation overhead of DS/DataCenter/metrics.py.
+
+    python -m benchmarks.metrics_bench [--budget-ns 1000] [--json metrics.json]
+
+Times Counter.inc, Gauge.set, Histogram.observe and a full
+perf_counter()-pair + observe (what an instrumented call site pays), and
+checks each against the per-observation budget. Exits non-zero if any
+operation is over budget.
+"""
+from __future__ import annotations
+import argparse
+import sys
+import timeit
+
+from benchmarks.common import write_results
+from DS.DataCenter.metrics import Registry
+
+
+def _ns_per_call(stmt, setup_globals, number=1_000_000, repeat=5) -> float:
+    best = min(timeit.repeat(stmt, globals=setup_globals, number=number, repeat=repeat))
+    return best / number * 1e9
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--budget-ns", type=float, default=1000.0)
+    ap.add_argument("--number", type=int, default=500_000)
+    ap.add_argument("--json", dest="json_out", help="write results to this file")
+    args = ap.parse_args(argv)
+
+    reg = Registry()
+    g = {
+        "counter": reg.counter("bench_total"),
+        "gauge": reg.gauge("bench_gauge"),
+        "hist": reg.histogram("bench_seconds"),
+        "perf_counter": __import__("time").perf_counter,
+    }
+    baseline = _ns_per_call("pass", g, args.number)
+    ops = {
+        "counter.inc": "counter.inc()",
+        "gauge.set": "gauge.set(3)",
+        "histogram.observe": "hist.observe(0.0007)",
+        "timed_observe": "t0 = perf_counter(); hist.observe(perf_counter() - t0)",
+    }
+    results = {}
+    for name, stmt in ops.items():
+        ns = _ns_per_call(stmt, g, args.number) - baseline
+        results[name] = {"ns": round(ns, 1), "ok": ns < args.budget_ns}
+        print(f"{name:<18} {ns:>8.1f} ns  {'ok' if ns < args.budget_ns else 'OVER BUDGET'}")
+
+    write_results(args.json_out, "metrics", vars(args), results)
+    if not all(r["ok"] for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+HTTP replication ring benchmark for DS/DataCenter (the run_all.py topology).
+
+    python -m benchmarks.replication_bench --nodes 7 --events 500 --rate 100 --json repl.json
+
+Starts N DataCenter Flask/Socket.IO servers on localhost ephemeral ports, one
+process per DC, each replicating to its successor. Package updates are POSTed to
+DC 0 at --rate per second; every event travels DC 0 -> 1 -> ... -> N-1 over
+/api/replicate (the final hop back to DC 0 is deduplicated). Latency is taken
+when the event lands on DC N-1, against the timestamp DC 0 gave it, so it
+covers every hop of the circle that does work. Every DC reports CPU and RSS.
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import logging
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import requests
+
+from benchmarks.common import ProcStats, free_port, ms, paced, percentiles, write_results
+
+
+def _wait_ready(url: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=0.5).ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def _run_dc(idx, port, successor_port, observe, stop, delivered, results):
+    from flask import request, request_finished
+    from DS.DataCenter.Datacenter import DataCenter
+
+    stats = ProcStats()
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    devnull = open(os.devnull, "w")
+    with contextlib.redirect_stdout(devnull):
+        dc = DataCenter(f"Bench DC {idx}", f"Zone-{idx}", 5000, "+00:00", idx)
+        dc.neighbors = [f"http://127.0.0.1:{successor_port}"]
+        dc.add_new_server(port=port)
+
+    arrivals = []  # (arrival wall time, origin timestamp)
+
+    def on_finished(sender, response, **extra):
+        if request.path != "/api/replicate" or response.status_code != 200:
+            return
+        body = response.get_json(silent=True) or {}
+        if body.get("skipped"):
+            return
+        event = (request.get_json(silent=True) or {}).get("event") or {}
+        arrivals.append((time.time(), event.get("ts", 0.0)))
+        with delivered.get_lock():
+            delivered.value += 1
+
+    if observe:
+        request_finished.connect(on_finished, dc.app)
+
+    stop.wait()
+    report = {"node": idx, "handled_events": sum(len(p["history"]) for p in dc.packages.values()),
+              **stats.snapshot()}
+    if observe:
+        report["arrivals"] = arrivals
+    results.put(report)
+    results.close()
+    results.join_thread()  # flush the report before the hard exit below
+    sys.stdout.flush()
+    os._exit(0)  # the Socket.IO server thread is not a daemon
+
+
+def run(args) -> dict:
+    n = args.nodes
+    ports = [free_port() for _ in range(n)]
+    stop = mp.Event()
+    delivered = mp.Value("i", 0)
+    results = mp.Queue()
+    procs = [
+        mp.Process(target=_run_dc, daemon=True,
+                   args=(i, ports[i], ports[(i + 1) % n], i == n - 1, stop, delivered, results))
+        for i in range(n)
+    ]
+    t_start = time.monotonic()
+    for p in procs:
+        p.start()
+    for port in ports:
+        if not _wait_ready(f"http://127.0.0.1:{port}/status", args.timeout):
+            stop.set()
+            raise SystemExit(f"DC on port {port} never became ready")
+    startup_s = time.monotonic() - t_start
+
+    http = requests.Session()
+    origin = f"http://127.0.0.1:{ports[0]}"
+    post_latencies = []
+    t0 = time.time()
+    for k in paced(args.events, args.rate):
+        t = time.monotonic()
+        http.post(f"{origin}/api/package/PKG-BENCH-{k % args.packages}/update",
+                  json={"location": f"hop-{k}", "status": "in_transit"}, timeout=10)
+        post_latencies.append(time.monotonic() - t)
+    deadline = time.monotonic() + args.timeout
+    while delivered.value < args.events and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop.set()
+
+    reports = sorted((results.get(timeout=30) for _ in procs), key=lambda r: r["node"])
+    for p in procs:
+        p.join(timeout=5)
+        if p.is_alive():
+            p.terminate()
+
+    arrivals = reports[-1].pop("arrivals")
+    latencies = [at - ts for at, ts in arrivals]
+    elapsed = (max(at for at, _ in arrivals) - t0) if arrivals else 0.0
+    summary = {
+        "startup_s": round(startup_s, 3),
+        "sent": args.events,
+        "delivered": len(arrivals),
+        "lost": args.events - len(arrivals),
+        "elapsed_s": round(elapsed, 4),
+        "events_per_s": round(len(arrivals) / elapsed, 1) if elapsed > 0 else 0.0,
+        "circle_latency_s": percentiles(latencies),
+        "update_post_latency_s": percentiles(post_latencies),
+    }
+    return {"summary": summary, "nodes": reports}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--nodes", type=int, default=7)
+    ap.add_argument("--events", type=int, default=300)
+    ap.add_argument("--rate", type=float, default=50, help="package updates/sec posted to DC 0 (0 = unthrottled)")
+    ap.add_argument("--packages", type=int, default=10, help="spread events over this many package ids")
+    ap.add_argument("--timeout", type=float, default=30)
+    ap.add_argument("--json", dest="json_out", help="write results to this file")
+    args = ap.parse_args(argv)
+
+    res = run(args)
+    s = res["summary"]
+    lat = s["circle_latency_s"]
+    print(f"http ring  nodes={args.nodes}  startup {s['startup_s']}s  delivered {s['delivered']}/{s['sent']} "
+          f"in {s['elapsed_s']}s -> {s['events_per_s']} events/s")
+    print(f"circle latency p50 {ms(lat['p50'])}  p90 {ms(lat['p90'])}  p99 {ms(lat['p99'])}  max {ms(lat['max'])}")
+    for r in res["nodes"]:
+        print(f"  DC {r['node']}: events {r['handled_events']:>6}  cpu {r['cpu_s']:.2f}s ({r['cpu_pct']}%)  rss {r['rss_kb']} kB")
+    return write_results(args.json_out, "replication", vars(args), res)
+
+
+if __name__ == "__main__":
+    main()
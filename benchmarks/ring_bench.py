@@ -0,0 +1,160 @@
+"""
+Raw TCP ring benchmark for Datacenter.DataCenterNode.
+
+    python -m benchmarks.ring_bench --nodes 7 --messages 20000 --rate 0 --json ring.json
+    python -m benchmarks.ring_bench --impl blocking --messages 1000
+
+Starts N nodes on localhost ephemeral ports, one process per node, wired into a
+ring. Node 0 injects messages at --rate per second (0 = as fast as it can) and
+timestamps each one; a message's full-circle latency is measured when it comes
+back to node 0. Every node reports its CPU time and RSS.
+
+--impl async     asyncio DataCenterNode (persistent pipelined connections)
+--impl blocking  BlockingDataCenterNode (one TCP connection per message; its
+                 recv(4096) truncates, so keep --payload small)
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import multiprocessing as mp
+import os
+import time
+
+from benchmarks.common import ProcStats, free_port, ms, paced, percentiles, write_results
+
+from Datacenter import BlockingDataCenterNode, DataCenterNode  # noqa: E402
+from ring_codec import RingMessage  # noqa: E402
+
+
+def _node_class(impl: str):
+    base = DataCenterNode if impl == "async" else BlockingDataCenterNode
+
+    class BenchNode(base):
+        """Counts what it handles; the origin records round-trip times."""
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.handled = 0
+            self.sent_at = {}
+            self.latencies = []
+            self.last_return = None
+
+        def handle_message(self, msg):
+            self.handled += 1
+            if isinstance(msg, RingMessage):
+                origin, seq = msg.origin, msg.seq
+            else:
+                origin, seq = msg.get("origin"), msg.get("seq")
+            if origin == self.datacenter_id:
+                now = time.monotonic()
+                sent = self.sent_at.pop(seq, None)
+                if sent is not None:
+                    self.latencies.append(now - sent)
+                    self.last_return = now
+                return
+            # skip base handle_message: the blocking node prints every message
+            self.send_to_successor(msg.forwarded() if isinstance(msg, RingMessage) else msg)
+
+    return BenchNode
+
+
+def _make_message(args, seq: int, payload: bytes):
+    if args.impl == "async" and args.wire == "binary":
+        return RingMessage(0, seq=seq, payload=payload)
+    return {"origin": 0, "seq": seq, "payload": payload.decode()}
+
+
+def _run_node(args, idx, port, successor_port, ready, start, stop, results):
+    stats = ProcStats()
+    # the blocking node logs each connection; keep the benchmark output readable
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        cls = _node_class(args.impl)
+        if args.impl == "async":
+            wires = ("json",) if args.wire == "json" else ("binary", "json")
+            node = cls(idx, port, successor_port, verbose=False, wires=wires)
+        else:
+            node = cls(idx, port, successor_port)
+        node.start()
+        time.sleep(0.2)  # let the listener bind before we report ready
+        ready.release()
+
+        report = {"node": idx}
+        if idx == 0:
+            start.wait()
+            payload = b"x" * args.payload
+            t0 = time.monotonic()
+            for seq in paced(args.messages, args.rate):
+                node.sent_at[seq] = time.monotonic()
+                node.send_to_successor(_make_message(args, seq, payload))
+            sent_done = time.monotonic()
+            deadline = sent_done + args.timeout
+            while len(node.latencies) < args.messages and time.monotonic() < deadline:
+                time.sleep(0.005)
+            elapsed = (node.last_return or sent_done) - t0
+            report.update({
+                "sent": args.messages,
+                "returned": len(node.latencies),
+                "lost": args.messages - len(node.latencies),
+                "elapsed_s": round(elapsed, 4),
+                "msgs_per_s": round(len(node.latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+                "hops_per_s": round(len(node.latencies) * args.nodes / elapsed, 1) if elapsed > 0 else 0.0,
+                "latency_s": percentiles(node.latencies),
+            })
+            stop.set()
+        else:
+            stop.wait()
+        report.update({"handled": node.handled, **stats.snapshot()})
+        results.put(report)
+        node.stop()
+
+
+def run(args) -> dict:
+    ports = [free_port() for _ in range(args.nodes)]
+    ready = mp.Semaphore(0)
+    start, stop = mp.Event(), mp.Event()
+    results = mp.Queue()
+    procs = [
+        mp.Process(target=_run_node, daemon=True,
+                   args=(args, i, ports[i], ports[(i + 1) % args.nodes], ready, start, stop, results))
+        for i in range(args.nodes)
+    ]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.acquire()
+    start.set()
+
+    reports = sorted((results.get(timeout=args.timeout + 60) for _ in procs), key=lambda r: r["node"])
+    for p in procs:
+        p.join(timeout=5)
+        if p.is_alive():
+            p.terminate()
+    return {"summary": reports[0], "nodes": reports}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--impl", choices=("async", "blocking"), default="async")
+    ap.add_argument("--wire", choices=("binary", "json"), default="binary", help="async only")
+    ap.add_argument("--nodes", type=int, default=7)
+    ap.add_argument("--messages", type=int, default=10000)
+    ap.add_argument("--rate", type=float, default=0, help="messages/sec injected at node 0 (0 = unthrottled)")
+    ap.add_argument("--payload", type=int, default=64, help="payload bytes per message")
+    ap.add_argument("--timeout", type=float, default=30, help="seconds to wait for stragglers")
+    ap.add_argument("--json", dest="json_out", help="write results to this file")
+    args = ap.parse_args(argv)
+
+    res = run(args)
+    s = res["summary"]
+    lat = s["latency_s"]
+    print(f"{args.impl}/{args.wire if args.impl == 'async' else 'json'}  nodes={args.nodes}  "
+          f"returned {s['returned']}/{s['sent']} in {s['elapsed_s']}s  "
+          f"-> {s['msgs_per_s']} msg/s ({s['hops_per_s']} hops/s)")
+    print(f"full-circle latency p50 {ms(lat['p50'])}  p90 {ms(lat['p90'])}  "
+          f"p99 {ms(lat['p99'])}  max {ms(lat['max'])}")
+    for r in res["nodes"]:
+        print(f"  node {r['node']}: handled {r['handled']:>7}  cpu {r['cpu_s']:.2f}s ({r['cpu_pct']}%)  rss {r['rss_kb']} kB")
+    return write_results(args.json_out, "ring", vars(args), res)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Sharded multi-group Paxos: commit throughput vs. number of groups.
+
+    python -m benchmarks.sharded_paxos_bench --groups 1,2,4,8 --commands 20000 --json shards.json
+
+Baseline is a single in-process PaxosCluster proposing one command at a time
+(what app2 does today). Each sharded run starts a ShardedPaxos router with N
+worker processes and pushes --commands commands keyed by synthetic package ids
+through propose_many() in batches of --batch, so every group works on its
+share of a batch in parallel. Throughput can only scale up to the number of
+cores; the result document records os.cpu_count().
+"""
+from __future__ import annotations
+import argparse
+import os
+import time
+
+from benchmarks.common import write_results
+from paxos import PaxosCluster
+from sharded_paxos import ShardedPaxos
+
+NAMES = [f"DC{i}" for i in range(1, 8)]
+
+
+def run_baseline(commands: int) -> dict:
+    cluster = PaxosCluster(NAMES)
+    t0 = time.perf_counter()
+    ok = sum(cluster.propose(f"c{i}", proposer=NAMES[0])["ok"] for i in range(commands))
+    elapsed = time.perf_counter() - t0
+    return {"groups": 0, "commits": ok, "seconds": round(elapsed, 4),
+            "commits_per_s": round(ok / elapsed, 1)}
+
+
+def run_sharded(groups: int, commands: int, batch: int) -> dict:
+    router = ShardedPaxos(NAMES, groups=groups).start()
+    try:
+        router.propose_many([(f"warmup-{g}", "NOOP") for g in range(groups * 4)])
+        start_total = router.state()["totalCommits"]
+        items = [(f"PKG-{i}", f"c{i}") for i in range(commands)]
+        t0 = time.perf_counter()
+        ok = 0
+        for i in range(0, commands, batch):
+            ok += sum(r["ok"] for r in router.propose_many(items[i:i + batch]))
+        elapsed = time.perf_counter() - t0
+        st = router.state()
+    finally:
+        router.stop()
+    return {"groups": groups, "commits": ok, "seconds": round(elapsed, 4),
+            "commits_per_s": round(ok / elapsed, 1),
+            "per_group": [g["commitIndex"] for g in st["groups"]],
+            "merged_commits": st["totalCommits"] - start_total}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--groups", default="1,2,4", type=lambda s: [int(x) for x in s.split(",")])
+    ap.add_argument("--commands", type=int, default=20000)
+    ap.add_argument("--batch", type=int, default=256, help="commands per propose_many() call")
+    ap.add_argument("--json", dest="json_out", help="write results to this file")
+    args = ap.parse_args(argv)
+
+    runs = [run_baseline(args.commands)]
+    print(f"baseline (1 group, in-process): {runs[0]['commits_per_s']:>10.0f} commits/s")
+    for g in args.groups:
+        r = run_sharded(g, args.commands, args.batch)
+        runs.append(r)
+        print(f"{g:>2} group(s), worker processes: {r['commits_per_s']:>10.0f} commits/s  "
+              f"per group {r['per_group']}")
+    params = {**vars(args), "cpu_count": os.cpu_count()}
+    return write_results(args.json_out, "sharded_paxos", params, {"runs": runs})
+
+
+if __name__ == "__main__":
+    main()
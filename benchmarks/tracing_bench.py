@@ -0,0 +1,54 @@
+"""
+Per-span overhead of DS/DataCenter/tracing.py.
+
+    python -m benchmarks.tracing_bench [--budget-ns 5000] [--json tracing.json]
+
+Times what instrumented call sites pay: the `if TRACER.enabled` guard that
+hot paths use with tracing disabled (the default), an empty
+`with tracer.span(...)` block disabled, in an unsampled trace and sampled
+(with two attribute sets and the ring-buffer store), and a sampled record().
+Exits non-zero if any operation is over budget.
+"""
+from __future__ import annotations
+import argparse
+import sys
+
+from benchmarks.common import write_results
+from benchmarks.metrics_bench import _ns_per_call
+from DS.DataCenter.tracing import Tracer
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--budget-ns", type=float, default=5000.0)
+    ap.add_argument("--capacity", type=int, default=4096)
+    ap.add_argument("--number", type=int, default=200_000)
+    ap.add_argument("--json", dest="json_out", help="write results to this file")
+    args = ap.parse_args(argv)
+
+    off = Tracer(capacity=args.capacity, sample_rate=0.0)
+    on = Tracer(capacity=args.capacity, sample_rate=1.0)
+    never = Tracer(capacity=args.capacity, sample_rate=1e-12)
+    g = {"off": off, "on": on, "never": never}
+    baseline = _ns_per_call("pass", g, args.number)
+    ops = {
+        "guard.disabled": "if off.enabled:\n    off.record('x', None, 1e-6)",
+        "span.disabled": "with off.span('x') as sp:\n    pass",
+        "span.unsampled": "with never.span('x') as sp:\n    pass",
+        "span.sampled": "with on.span('x') as sp:\n    sp.set('a', 1)\n    sp.set('b', 2)",
+        "record.sampled": "on.record('x', None, 1e-6, parent)",
+    }
+    g["parent"] = on.record("parent")
+    results = {}
+    for name, stmt in ops.items():
+        ns = _ns_per_call(stmt, g, args.number) - baseline
+        results[name] = {"ns": round(ns, 1), "ok": ns < args.budget_ns}
+        print(f"{name:<15} {ns:>8.1f} ns  {'ok' if ns < args.budget_ns else 'OVER BUDGET'}")
+
+    write_results(args.json_out, "tracing", vars(args), results)
+    if not all(r["ok"] for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# failure_detector.py
+from __future__ import annotations
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PhiAccrualDetector:
+    """
+    Phi-accrual failure detector (Hayashibara et al.), one per monitored node.
+      - keeps a sliding window of heartbeat inter-arrival times
+      - phi(now) = -log10(P(a heartbeat arrives later than now)), assuming
+        inter-arrivals are normally distributed with the window's mean/std
+    phi grows continuously while heartbeats are missing; the caller picks a
+    threshold (phi=8 ~ one wrong suspicion in 10^8 under the model).
+    """
+    def __init__(self, window: int = 100, min_std: float = 0.05,
+                 acceptable_pause: float = 0.0, first_interval: float = 1.0,
+                 now: Optional[float] = None):
+        self.intervals: deque = deque(maxlen=window)
+        self.min_std = min_std
+        self.acceptable_pause = acceptable_pause
+        # seed with a guess so phi is defined before the second heartbeat
+        self.intervals.extend((first_interval - first_interval / 4, first_interval + first_interval / 4))
+        self.last: Optional[float] = now
+
+    def heartbeat(self, now: float, resume: bool = False) -> None:
+        """
+        resume: first heartbeat after the node was suspected. The outage is not
+        an inter-arrival sample; recording it would inflate mean/std for the
+        next `window` heartbeats and make the next failure take that long to detect.
+        """
+        if self.last is not None and not resume:
+            self.intervals.append(now - self.last)
+        self.last = now
+
+    def phi(self, now: float) -> float:
+        if self.last is None:
+            return 0.0
+        n = len(self.intervals)
+        mean = sum(self.intervals) / n
+        var = sum((x - mean) ** 2 for x in self.intervals) / n
+        std = max(math.sqrt(var), self.min_std)
+        y = (now - self.last - mean - self.acceptable_pause) / std
+        # logistic approximation of the normal CDF (as used by Akka/Cassandra)
+        e = math.exp(-y * (1.5976 + 0.070566 * y * y))
+        if y > 0:
+            p_later = e / (1.0 + e)
+        else:
+            p_later = 1.0 - 1.0 / (1.0 + e)
+        return -math.log10(max(p_later, 1e-300))
+
+
+class HeartbeatMonitor:
+    """
+    Background thread that heartbeats each node's /status URL and turns phi
+    suspicion into membership changes:
+      - on_down(nid) once phi crosses `threshold`
+      - on_up(nid) when a suspected node answers again
+    Probes run in parallel on a small thread pool, so a slow node never delays
+    the heartbeats of the others; each pool thread keeps its own keep-alive
+    HTTP session (requests.Session is not thread-safe).
+    """
+    def __init__(self, targets: Dict[int, str],
+                 on_down: Callable[[int], None], on_up: Callable[[int], None],
+                 interval: float = 0.5, timeout: float = 1.0, threshold: float = 8.0,
+                 window: int = 100, min_std: float = 0.05,
+                 clock: Callable[[], float] = time.monotonic):
+        self.targets = dict(targets)
+        self.on_down = on_down
+        self.on_up = on_up
+        self.interval = interval
+        self.timeout = timeout
+        self.threshold = threshold
+        self.clock = clock
+        now = clock()
+        self.detectors: Dict[int, PhiAccrualDetector] = {
+            nid: PhiAccrualDetector(window=window, min_std=min_std, first_interval=interval, now=now)
+            for nid in self.targets
+        }
+        self.suspected: Dict[int, bool] = {nid: False for nid in self.targets}
+        self._pending: Dict[int, object] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._local = threading.local()
+        self._sessions = []
+        self._pool = ThreadPoolExecutor(max_workers=len(self.targets) or 1, thread_name_prefix="heartbeat")
+
+    # ---------- probing ----------
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(self.targets) or 1, pool_maxsize=1)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _probe(self, nid: int) -> None:
+        try:
+            r = self._session().get(self.targets[nid], timeout=self.timeout)
+            ok = r.ok and (r.json() or {}).get("is_operational", True)
+        except (requests.RequestException, ValueError):
+            ok = False
+        if ok:
+            now = self.clock()
+            with self._lock:
+                det = self.detectors[nid]
+                det.heartbeat(now, resume=self.suspected[nid] or det.phi(now) >= self.threshold)
+
+    def tick(self) -> None:
+        """Send due probes, then re-evaluate suspicion for every node."""
+        for nid in self.targets:
+            fut = self._pending.get(nid)
+            if fut is None or fut.done():
+                self._pending[nid] = self._pool.submit(self._probe, nid)
+        now = self.clock()
+        for nid, det in self.detectors.items():
+            with self._lock:
+                phi = det.phi(now)
+            if phi >= self.threshold and not self.suspected[nid]:
+                self.suspected[nid] = True
+                self._notify(self.on_down, nid)
+            elif phi < self.threshold and self.suspected[nid]:
+                self.suspected[nid] = False
+                self._notify(self.on_up, nid)
+
+    def _notify(self, cb: Callable[[int], None], nid: int) -> None:
+        try:
+            cb(nid)
+        except Exception as e:
+            print(f"[failure-detector] callback for node {nid} failed: {e}")
+
+    def phi(self, nid: int, now: Optional[float] = None) -> float:
+        with self._lock:
+            return self.detectors[nid].phi(self.clock() if now is None else now)
+
+    def state(self) -> dict:
+        now = self.clock()
+        return {
+            "running": self.running,
+            "threshold": self.threshold,
+            "nodes": [
+                {"id": nid, "phi": round(self.phi(nid, now), 3), "suspected": self.suspected[nid]}
+                for nid in self.targets
+            ],
+        }
+
+    # ---------- lifecycle ----------
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(self.interval)
+
+    def start(self) -> "HeartbeatMonitor":
+        self._thread = threading.Thread(target=self._run, name="heartbeat-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + self.timeout)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
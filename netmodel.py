@@ -0,0 +1,107 @@
+# netmodel.py
+from __future__ import annotations
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Rough coordinates (lat, lon) of the region each DC location stands for
+LOCATION_COORDS: Dict[str, Tuple[float, float]] = {
+    "Asia": (19.08, 72.88),            # Mumbai
+    "Australia": (-33.87, 151.21),     # Sydney
+    "Europe": (50.11, 8.68),           # Frankfurt
+    "Africa": (-26.20, 28.05),         # Johannesburg
+    "North America": (38.90, -77.04),  # Virginia
+    "South America": (-23.55, -46.63), # São Paulo
+    "Atlantic": (38.72, -9.14),        # Lisbon
+}
+
+EARTH_RADIUS_KM = 6371.0
+FIBER_KM_PER_MS = 200.0     # light in fibre covers ~200 km per millisecond
+ROUTE_FACTOR = 1.5          # real paths are longer than the great circle
+BASE_ONE_WAY_MS = 1.0       # switching/processing floor per direction
+
+
+def utc_offset_hours(offset: str) -> float:
+    """'+05:30' -> 5.5"""
+    sign = -1.0 if offset.strip().startswith("-") else 1.0
+    hh, _, mm = offset.strip().lstrip("+-").partition(":")
+    return sign * (int(hh) + int(mm or 0) / 60.0)
+
+
+def coords_for(location: Optional[str], utc_offset: Optional[str]) -> Tuple[float, float]:
+    """Known location, else a point on the equator at the UTC offset's longitude (15°/hour)."""
+    if location in LOCATION_COORDS:
+        return LOCATION_COORDS[location]
+    return (0.0, 15.0 * utc_offset_hours(utc_offset or "+00:00"))
+
+
+def great_circle_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+class NetworkModel:
+    """
+    Link-latency matrix between named nodes (round-trip times, in seconds).
+    - seeded from geography: distance / fibre speed * route factor, both ways
+    - observe(a, b, rtt) folds in measured RTTs (EWMA), overriding the seed
+    - estimate() simulates Paxos commit latency for a leader (app2 ranks
+      leader candidates by it, see _latency_rank/best_leader_id)
+    """
+    def __init__(self, coords: Dict[str, Tuple[float, float]], alpha: float = 0.2):
+        self.coords = dict(coords)
+        self.alpha = alpha
+        self._rtt: Dict[Tuple[str, str], float] = {}
+        for a in self.coords:
+            for b in self.coords:
+                self._rtt[(a, b)] = self._seed_rtt(a, b)
+
+    @classmethod
+    def from_datacenters(cls, datacenters: Iterable, **kwargs) -> "NetworkModel":
+        """Build from DataCenter objects (uses .name, .location, .utc_offset)."""
+        return cls({dc.name: coords_for(dc.location, dc.utc_offset) for dc in datacenters}, **kwargs)
+
+    def _seed_rtt(self, a: str, b: str) -> float:
+        if a == b:
+            return 0.0
+        one_way_ms = BASE_ONE_WAY_MS + great_circle_km(self.coords[a], self.coords[b]) / FIBER_KM_PER_MS * ROUTE_FACTOR
+        return 2 * one_way_ms / 1000.0
+
+    # ---------- links ----------
+    def rtt(self, a: str, b: str) -> float:
+        return self._rtt[(a, b)]
+
+    def observe(self, a: str, b: str, rtt: float) -> None:
+        """Fold a measured round trip (seconds) into both directions of the link."""
+        for key in ((a, b), (b, a)):
+            self._rtt[key] = (1 - self.alpha) * self._rtt[key] + self.alpha * rtt
+
+    def matrix(self) -> dict:
+        names = list(self.coords)
+        return {"nodes": names, "rtt_ms": [[round(self.rtt(a, b) * 1000, 1) for b in names] for a in names]}
+
+    # ---------- commit-latency simulation ----------
+    def quorum_rtt(self, leader: str, acceptors: List[Tuple[str, int]], quorum: int) -> Optional[float]:
+        """
+        Time for `leader` to collect `quorum` weight of replies when it asks every
+        acceptor in parallel: the RTT of the farthest acceptor it has to wait for.
+        acceptors: (name, weight) of the live ones. None if the quorum is unreachable.
+        """
+        got = 0
+        for rtt, weight in sorted((self.rtt(leader, name), w) for name, w in acceptors):
+            got += weight
+            if got >= quorum:
+                return rtt
+        return None
+
+    def estimate(self, leader: str, cluster, phase1_share: float = 0.0) -> dict:
+        """
+        Expected commit latency with `leader` proposing to PaxosCluster `cluster`.
+        phase1_share: fraction of commits that also pay Phase 1 (leader churn);
+        0 models a stable leader that only pays Phase 2.
+        """
+        live = [(a.name, a.weight) for a in cluster.alive_acceptors()]
+        p1 = self.quorum_rtt(leader, live, cluster.phase1_quorum)
+        p2 = self.quorum_rtt(leader, live, cluster.phase2_quorum)
+        expected = None if p1 is None or p2 is None else p2 + phase1_share * p1
+        return {"leader": leader, "phase1_s": p1, "phase2_s": p2, "expected_s": expected}
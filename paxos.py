@@ -1,12 +1,31 @@
 # paxos.py
 from __future__ import annotations
+import time
 from dataclasses import dataclass, asdict
-from typing import Dict, Optional, List, Tuple
+from typing import Callable, Dict, Iterable, Optional, List, Tuple
+
+from DS.DataCenter.metrics import REGISTRY
+from DS.DataCenter.tracing import TRACER
+
+_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 7, 9, 12, 16)
+PROPOSE_SECONDS = REGISTRY.histogram("paxos_propose_duration_seconds", "End-to-end propose() time")
+PHASE_SECONDS = {
+    phase: REGISTRY.histogram("paxos_phase_duration_seconds", "Time spent in each Paxos phase", {"phase": phase})
+    for phase in ("prepare", "accept")
+}
+PROMISES = REGISTRY.histogram("paxos_promises", "PROMISE replies per Phase 1", buckets=_COUNT_BUCKETS)
+ACCEPTS = REGISTRY.histogram("paxos_accepts", "ACCEPTED replies per Phase 2", buckets=_COUNT_BUCKETS)
+COMMITS = REGISTRY.counter("paxos_commits_total", "Values chosen")
+PROPOSE_FAILURES = {
+    reason: REGISTRY.counter("paxos_propose_failures_total", "Failed proposals by reason", {"reason": reason})
+    for reason in ("no-acceptors-alive", "no-majority-phase1", "no-majority-phase2")
+}
 
 @dataclass
 class Acceptor:
     name: str
     alive: bool = True
+    weight: int = 1                      # votes this acceptor carries in a quorum
     promised_n: int = -1                 # highest prepare number promised
     accepted_n: Optional[int] = None     # highest accept number accepted
     accepted_v: Optional[str] = None     # value accepted for current slot
@@ -21,28 +40,120 @@ class PaxosCluster:
     - 3+ acceptors (e.g., EU/US/APAC)
     - propose(command) runs Phase 1 & Phase 2 for next log slot (commitIndex+1)
     - crash/recover acceptors
+
+    Flexible Paxos quorums (Howard et al.): Phase 1 and Phase 2 quorums only
+    have to intersect, i.e. phase1_quorum + phase2_quorum > total weight.
+    Both default to a simple majority. Acceptors may carry integer weights,
+    and quorum sizes are counted in weight.
+    - A proposer that already won Phase 1 (the stable leader) skips it on later
+      slots and only pays the Phase 2 quorum. Phase 1 runs again on leader change
+      or when a higher ballot shows up.
+    - Phase 2 stops as soon as it has a quorum. Acceptors are asked nearest-first
+      when `distance(proposer, acceptor)` is set.
     """
-    def __init__(self, names: List[str]):
-        self.acceptors: Dict[str, Acceptor] = {n: Acceptor(n) for n in names}
+    def __init__(self, names: List[str], phase1_quorum: Optional[int] = None,
+                 phase2_quorum: Optional[int] = None, weights: Optional[Dict[str, int]] = None):
+        weights = weights or {}
+        for n, w in weights.items():
+            if n not in names or not isinstance(w, int) or w < 1:
+                raise ValueError(f"bad weight for acceptor {n!r}: {w!r}")
+        self.acceptors: Dict[str, Acceptor] = {n: Acceptor(n, weight=weights.get(n, 1)) for n in names}
         self.proposal_counter: int = 0      # ensures unique increasing numbers
         self.commitIndex: int = 0
         self.log: Dict[int, str] = {}       # index -> chosen value
+        self.leader: Optional[str] = None   # proposer whose Phase 1 is still in force
+        self.leader_n: Optional[int] = None
+        self.distance: Optional[Callable[[str, str], float]] = None
+        self.set_quorums(phase1_quorum, phase2_quorum)
 
     # -------- helpers --------
     def majority(self) -> int:
         return len(self.acceptors) // 2 + 1
 
+    def total_weight(self) -> int:
+        return sum(a.weight for a in self.acceptors.values())
+
+    def set_quorums(self, phase1: Optional[int] = None, phase2: Optional[int] = None):
+        total = self.total_weight()
+        q1 = total // 2 + 1 if phase1 is None else phase1
+        q2 = total // 2 + 1 if phase2 is None else phase2
+        if not (0 < q1 <= total and 0 < q2 <= total):
+            raise ValueError(f"quorums must be in 1..{total}, got phase1={q1} phase2={q2}")
+        if q1 + q2 <= total:
+            raise ValueError(f"phase1 ({q1}) + phase2 ({q2}) quorums must exceed total weight {total}")
+        self.phase1_quorum, self.phase2_quorum = q1, q2
+        self.leader = self.leader_n = None   # new rules: the next leader re-runs Phase 1
+
+    def weight_of(self, names: Iterable[str]) -> int:
+        return sum(self.acceptors[n].weight for n in names)
+
     def alive_acceptors(self) -> List[Acceptor]:
         return [a for a in self.acceptors.values() if a.alive]
 
+    def accept_order(self, proposer: Optional[str]) -> List[Acceptor]:
+        """Alive acceptors, nearest to the proposer first when a distance model is set."""
+        alive = self.alive_acceptors()
+        if proposer is not None and self.distance is not None:
+            alive.sort(key=lambda a: self.distance(proposer, a.name))
+        return alive
+
     def next_proposal_n(self) -> int:
         self.proposal_counter += 1
         return self.proposal_counter
 
+    # -------- phases (message handling at the acceptors) --------
+    def prepare(self, n: int, to: Optional[Iterable[str]] = None) -> Tuple[List[str], Tuple[int, Optional[str]]]:
+        """
+        PREPARE(n) to alive acceptors (optionally only those in `to`).
+        Returns who promised, and the highest (accepted_n, accepted_v) they reported.
+        """
+        targets = self.alive_acceptors() if to is None else [self.acceptors[x] for x in to if self.acceptors[x].alive]
+        promised: List[str] = []
+        highest_accepted: Tuple[int, Optional[str]] = (-1, None)  # (na, va)
+        for acc in targets:
+            if n > acc.promised_n:
+                acc.promised_n = n
+                promised.append(acc.name)
+                # return any previously accepted value (if this slot was in progress)
+                if acc.accepted_n is not None and acc.accepted_v is not None:
+                    if acc.accepted_n > highest_accepted[0]:
+                        highest_accepted = (acc.accepted_n, acc.accepted_v)
+            else:
+                # reject prepare (no reply)
+                pass
+        return promised, highest_accepted
+
+    def accept(self, n: int, v: str, to: Optional[Iterable[Acceptor]] = None,
+               stop_at: Optional[int] = None) -> List[str]:
+        """
+        ACCEPT(n, v) to `to` (default: alive acceptors), in order.
+        Stops once the accepted weight reaches `stop_at`, if given.
+        """
+        accepted: List[str] = []
+        weight = 0
+        for acc in (self.alive_acceptors() if to is None else to):
+            if not acc.alive:
+                continue
+            # ACCEPT(n, v): accept iff no higher promise was made
+            if n >= acc.promised_n:
+                acc.promised_n = n
+                acc.accepted_n = n
+                acc.accepted_v = v
+                accepted.append(acc.name)
+                weight += acc.weight
+                if stop_at is not None and weight >= stop_at:
+                    break
+            else:
+                # reject accept
+                pass
+        return accepted
+
     # -------- API --------
     def crash(self, name: str) -> bool:
         if name in self.acceptors:
             self.acceptors[name].alive = False
+            if self.leader == name:
+                self.leader = self.leader_n = None
             return True
         return False
 
@@ -60,21 +171,47 @@ class PaxosCluster:
                 {
                     "name": a.name,
                     "alive": a.alive,
+                    "weight": a.weight,
                     "promised": a.promised_n,
                     "accepted": None if a.accepted_n is None else [a.accepted_n, a.accepted_v],
                 }
                 for a in self.acceptors.values()
             ],
             "majority": self.majority(),
+            "quorums": {"phase1": self.phase1_quorum, "phase2": self.phase2_quorum,
+                        "totalWeight": self.total_weight()},
+            "leader": self.leader,
         }
 
-    def propose(self, command: str) -> dict:
+    def propose(self, command: str, proposer: Optional[str] = None) -> dict:
         """
         Propose 'command' at slot = commitIndex+1.
-        Phase 1: PREPARE(n) to alive; need majority PROMISE.
-        Phase 2: ACCEPT(n, v) to alive; need majority ACCEPTED.
+        Phase 1: PREPARE(n) to alive; need phase1_quorum weight of PROMISEs.
+                 Skipped when `proposer` is the leader that already holds ballot n.
+        Phase 2: ACCEPT(n, v) nearest-first; need phase2_quorum weight of ACCEPTEDs.
         """
+        if TRACER.enabled:
+            with TRACER.span("paxos.propose", {"proposer": proposer}) as sp:
+                res = self._timed_propose(command, proposer)
+                sp.set("ok", res["ok"])
+                sp.set("slot", res.get("slot"))
+                return res
+        return self._timed_propose(command, proposer)
+
+    def _timed_propose(self, command: str, proposer: Optional[str]) -> dict:
+        t_start = time.perf_counter()
+        try:
+            res = self._propose(command, proposer)
+            if not res["ok"] and res.get("reason") == "no-majority-phase2" and res.get("phase1") == "skipped":
+                # someone else prepared a higher ballot since; win Phase 1 again
+                res = self._propose(command, proposer)
+            return res
+        finally:
+            PROPOSE_SECONDS.observe(time.perf_counter() - t_start)
+
+    def _propose(self, command: str, proposer: Optional[str]) -> dict:
         if not self.alive_acceptors():
+            PROPOSE_FAILURES["no-acceptors-alive"].inc()
             return {"ok": False, "reason": "no-acceptors-alive"}
 
         slot = self.commitIndex + 1
@@ -82,53 +219,56 @@ class PaxosCluster:
         if slot in self.log:
             return {"ok": True, "slot": slot, "chosen": self.log[slot], "already": True}
 
-        n = self.next_proposal_n()
-
-        # ----- Phase 1: Prepare/Promise -----
-        promises = 0
-        highest_accepted: Tuple[int, Optional[str]] = (-1, None)  # (na, va)
-        for acc in self.alive_acceptors():
-            # PREPARE(n)
-            if n > acc.promised_n:
-                acc.promised_n = n
-                promises += 1
-                # return any previously accepted value (if this slot was in progress)
-                if acc.accepted_n is not None and acc.accepted_v is not None:
-                    if acc.accepted_n > highest_accepted[0]:
-                        highest_accepted = (acc.accepted_n, acc.accepted_v)
-            else:
-                # reject prepare (no reply)
-                pass
+        v = command
+        if proposer is not None and proposer == self.leader and self.leader_n is not None:
+            n = self.leader_n
+            phase1 = "skipped"
+        else:
+            n = self.next_proposal_n()
+            phase1 = "run"
 
-        if promises < self.majority():
-            return {"ok": False, "reason": "no-majority-phase1", "promises": promises}
+            # ----- Phase 1: Prepare/Promise -----
+            t_phase1 = time.perf_counter()
+            promised, highest_accepted = self.prepare(n)
+            elapsed = time.perf_counter() - t_phase1
+            PHASE_SECONDS["prepare"].observe(elapsed)
+            if TRACER.enabled:
+                TRACER.record("paxos.prepare", {"n": n, "promised": promised}, elapsed)
+            PROMISES.observe(len(promised))
+            if self.weight_of(promised) < self.phase1_quorum:
+                PROPOSE_FAILURES["no-majority-phase1"].inc()
+                return {"ok": False, "reason": "no-majority-phase1", "promises": len(promised),
+                        "promisedWeight": self.weight_of(promised)}
+            self.leader, self.leader_n = proposer, n
 
-        # choose value: highest accepted if any, otherwise our command
-        v = highest_accepted[1] if highest_accepted[0] != -1 else command
+            # choose value: highest accepted if any, otherwise our command
+            v = highest_accepted[1] if highest_accepted[0] != -1 else command
 
         # ----- Phase 2: Accept/Accepted -----
-        accepts = 0
-        for acc in self.alive_acceptors():
-            # ACCEPT(n, v): accept iff no higher promise was made
-            if n >= acc.promised_n:
-                acc.promised_n = n
-                acc.accepted_n = n
-                acc.accepted_v = v
-                accepts += 1
-            else:
-                # reject accept
-                pass
-
-        if accepts < self.majority():
-            return {"ok": False, "reason": "no-majority-phase2", "accepts": accepts}
+        t_phase2 = time.perf_counter()
+        accepted = self.accept(n, v, self.accept_order(proposer), stop_at=self.phase2_quorum)
+        elapsed = time.perf_counter() - t_phase2
+        PHASE_SECONDS["accept"].observe(elapsed)
+        if TRACER.enabled:
+            TRACER.record("paxos.accept", {"n": n, "accepted": accepted}, elapsed)
+        ACCEPTS.observe(len(accepted))
+        if self.weight_of(accepted) < self.phase2_quorum:
+            # The ballot is spent: some acceptors may now hold v under n, so reusing n
+            # for another value would break one-value-per-ballot. Next time, run
+            # Phase 1 again with a fresh ballot (which also recovers v if it was chosen).
+            self.leader = self.leader_n = None
+            PROPOSE_FAILURES["no-majority-phase2"].inc()
+            return {"ok": False, "reason": "no-majority-phase2", "accepts": len(accepted),
+                    "acceptedWeight": self.weight_of(accepted), "phase1": phase1}
 
         # chosen!
         self.log[slot] = v
         self.commitIndex = slot
+        COMMITS.inc()
 
         # clear per-slot accepted memory to keep UI clean (optional)
         for acc in self.acceptors.values():
             # keep promised_n (for safety), drop accepted (we moved to next slot)
             acc.reset_accepted()
 
-        return {"ok": True, "slot": slot, "chosen": v}
+        return {"ok": True, "slot": slot, "chosen": v, "phase1": phase1, "acceptedBy": accepted}
@@ -0,0 +1,175 @@
+# paxos_checker.py
+"""
+Randomized safety checker for PaxosCluster quorum configurations.
+
+    python paxos_checker.py --trials 2000
+    python paxos_checker.py --unsafe      # non-intersecting quorums: should find violations
+
+Each trial builds a cluster with random size, integer weights and a random
+valid (phase1 + phase2 > total weight) quorum pair, then runs two kinds of
+trial:
+
+  interleave  Several competing proposers drive PaxosCluster.prepare/accept
+              for one slot in a random interleaving, while acceptors crash
+              and recover and messages reach random subsets of acceptors. A
+              prepared proposer may run Phase 2 over and over with the same
+              ballot, which is what a stable leader does when it skips Phase 1.
+  propose     Random proposers call PaxosCluster.propose() over many slots,
+              with acceptors crashing and recovering and a random distance
+              model ordering Phase 2. This covers the stable-leader Phase 1
+              skip, the retry after a skipped Phase 2 fails, accept_order and
+              stop_at.
+
+Safety: once a value is chosen (accepted by phase2-quorum weight in a single
+ballot), no other value may ever be chosen for that slot. propose trials also
+check that a ballot never carries two values, and that the log holds the
+chosen value. --unsafe only applies to interleave trials: propose() commits
+the moment a value is chosen, so broken quorums do not show up there.
+"""
+from __future__ import annotations
+import argparse
+import random
+from typing import Dict, Optional, Set, Tuple
+
+from paxos import PaxosCluster
+
+
+def _random_cluster(rng: random.Random, unsafe: bool) -> PaxosCluster:
+    n = rng.randint(3, 7)
+    names = [f"A{i}" for i in range(n)]
+    weights = {a: rng.choice((1, 1, 1, 2, 3)) for a in names}
+    cluster = PaxosCluster(names, weights=weights)
+    total = cluster.total_weight()
+    if unsafe:
+        # deliberately break intersection; bypasses set_quorums() validation
+        q1 = rng.randint(1, total - 1)
+        cluster.phase1_quorum, cluster.phase2_quorum = q1, rng.randint(1, total - q1)
+    else:
+        q1 = rng.randint(1, total)
+        cluster.set_quorums(q1, rng.randint(max(1, total - q1 + 1), total))
+    return cluster
+
+
+def run_trial(seed: int, proposers: int = 3, steps: int = 200, unsafe: bool = False) -> Optional[str]:
+    """Returns a description of the first safety violation, or None."""
+    rng = random.Random(seed)
+    cluster = _random_cluster(rng, unsafe)
+    names = list(cluster.acceptors)
+    ballots: Dict[int, dict] = {}          # proposer -> {"n", "v"} once Phase 1 succeeded
+    accepted_by: Dict[int, Set[str]] = {}  # ballot -> acceptors that accepted it
+    chosen: Optional[str] = None
+
+    for step in range(steps):
+        r = rng.random()
+        if r < 0.1:
+            cluster.crash(rng.choice(names))
+            continue
+        if r < 0.2:
+            cluster.recover(rng.choice(names))
+            continue
+
+        p = rng.randrange(proposers)
+        reach = rng.sample(names, rng.randint(1, len(names)))   # who gets the message
+        if p not in ballots or rng.random() < 0.15:
+            # (re)run Phase 1 with a fresh, higher ballot
+            n = cluster.next_proposal_n()
+            promised, (na, va) = cluster.prepare(n, to=reach)
+            ballots.pop(p, None)
+            if cluster.weight_of(promised) >= cluster.phase1_quorum:
+                ballots[p] = {"n": n, "v": va if na != -1 else f"p{p}-n{n}"}
+            continue
+
+        n, v = ballots[p]["n"], ballots[p]["v"]
+        accepted = cluster.accept(n, v, to=[cluster.acceptors[x] for x in reach])
+        accepted_by.setdefault(n, set()).update(accepted)
+        if cluster.weight_of(accepted_by[n]) >= cluster.phase2_quorum:
+            if chosen is None:
+                chosen = v
+            elif chosen != v:
+                return (f"seed={seed} step={step}: chose {v!r} (ballot {n}) after {chosen!r}; "
+                        f"weights={ {a.name: a.weight for a in cluster.acceptors.values()} } "
+                        f"q1={cluster.phase1_quorum} q2={cluster.phase2_quorum}")
+    return None
+
+
+def run_propose_trial(seed: int, proposers: int = 3, steps: int = 200) -> Optional[str]:
+    """Drives PaxosCluster.propose(); returns a description of the first safety violation, or None."""
+    rng = random.Random(seed)
+    cluster = _random_cluster(rng, unsafe=False)
+    names = list(cluster.acceptors)
+    pos = {a: rng.random() for a in names}
+    cluster.distance = lambda a, b: abs(pos[a] - pos[b])
+    who = rng.sample(names, min(proposers, len(names)))
+
+    sent: Dict[Tuple[int, int], str] = {}        # (slot, ballot) -> value
+    votes: Dict[Tuple[int, int], Set[str]] = {}  # (slot, ballot) -> acceptors that accepted it
+    chosen: Dict[int, str] = {}
+    problems = []
+    accept = cluster.accept
+
+    def checked_accept(n, v, to=None, stop_at=None):
+        slot = cluster.commitIndex + 1
+        if sent.setdefault((slot, n), v) != v:
+            problems.append(f"slot {slot}: ballot {n} sent {v!r} after {sent[(slot, n)]!r}")
+        accepted = accept(n, v, to, stop_at)
+        votes.setdefault((slot, n), set()).update(accepted)
+        if cluster.weight_of(votes[(slot, n)]) >= cluster.phase2_quorum:
+            if chosen.setdefault(slot, v) != v:
+                problems.append(f"slot {slot}: chose {v!r} (ballot {n}) after {chosen[slot]!r}")
+        return accepted
+
+    cluster.accept = checked_accept
+    for step in range(steps):
+        r = rng.random()
+        if r < 0.15:
+            cluster.crash(rng.choice(names))
+        elif r < 0.3:
+            cluster.recover(rng.choice(names))
+        else:
+            res = cluster.propose(f"c{step}", proposer=rng.choice(who))
+            if res["ok"] and chosen.get(res["slot"]) != res["chosen"]:
+                problems.append(f"slot {res['slot']}: committed {res['chosen']!r}, chosen {chosen.get(res['slot'])!r}")
+        if problems:
+            return (f"seed={seed} step={step}: {problems[0]}; "
+                    f"weights={ {a.name: a.weight for a in cluster.acceptors.values()} } "
+                    f"q1={cluster.phase1_quorum} q2={cluster.phase2_quorum}")
+    for slot, v in cluster.log.items():
+        if chosen.get(slot) != v:
+            return f"seed={seed}: log[{slot}]={v!r} but chosen {chosen.get(slot)!r}"
+    return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--trials", type=int, default=1000)
+    ap.add_argument("--steps", type=int, default=200)
+    ap.add_argument("--proposers", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0, help="first seed; trials use seed..seed+trials-1")
+    ap.add_argument("--unsafe", action="store_true", help="use non-intersecting quorums (checker self-test)")
+    args = ap.parse_args(argv)
+
+    violations = []
+    mode = "non-intersecting" if args.unsafe else "flexible"
+    for seed in range(args.seed, args.seed + args.trials):
+        v = run_trial(seed, args.proposers, args.steps, args.unsafe)
+        if v:
+            violations.append(v)
+    print(f"{args.trials} interleave trials with {mode} quorums: {len(violations)} safety violations")
+    if not args.unsafe:
+        found = len(violations)
+        for seed in range(args.seed, args.seed + args.trials):
+            v = run_propose_trial(seed, args.proposers, args.steps)
+            if v:
+                violations.append(v)
+        print(f"{args.trials} propose trials with {mode} quorums: {len(violations) - found} safety violations")
+    for v in violations[:5]:
+        print("  " + v)
+    if violations and not args.unsafe:
+        raise SystemExit(1)
+    if not violations and args.unsafe:
+        print("  (expected violations were not found; increase --trials)")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,18 @@
 from __future__ import annotations
+import time
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional
+
+from DS.DataCenter.metrics import REGISTRY
+from DS.DataCenter.tracing import TRACER
+
+ELECTION_SECONDS = REGISTRY.histogram("ring_election_duration_seconds", "Time to compute a full election trace")
+ELECTION_HOPS = REGISTRY.histogram("ring_election_hops", "ELECTION + COORDINATOR messages per election",
+                                   buckets=(1, 2, 4, 6, 8, 10, 12, 16, 24, 32, 48))
+ELECTIONS = {
+    result: REGISTRY.counter("ring_elections_total", "Elections by outcome", {"result": result})
+    for result in ("ok", "no-alive-nodes", "ring-broken", "loop-guard", "failed")
+}
 
 @dataclass
 class Node:
@@ -20,13 +32,20 @@ class Ring:
              - else (already participant): forward unchanged.
          - if j == own id: winner; send COORDINATOR(k) around the ring.
       3) On receive COORDINATOR(k): set elected=k, mark non-participant, forward.
+    ">" and "<" compare ids by default. With a `rank` function they compare
+    (rank(id), id), so the node with the highest rank wins instead (e.g. the one
+    with the lowest expected commit latency).
     """
-    def __init__(self, ids: List[int] | None = None):
+    def __init__(self, ids: List[int] | None = None, rank: Optional[Callable[[int], Any]] = None):
         ids = ids or [1, 2, 3, 4, 5, 6]
         self.order: List[int] = ids[:]                         # clockwise order
         self.idx: Dict[int, int] = {v: i for i, v in enumerate(self.order)}
         self.nodes: Dict[int, Node] = {i: Node(i) for i in self.order}
         self.leader_id: Optional[int] = None
+        self.rank = rank
+
+    def _key(self, id_: int):
+        return id_ if self.rank is None else (self.rank(id_), id_)
 
     # ---------- helpers ----------
     def next_alive(self, id_: int) -> Optional[int]:
@@ -69,6 +88,16 @@ class Ring:
             return True
         return False
 
+    def handover(self, nid: int) -> bool:
+        """Make a live node leader directly (COORDINATOR without an election)."""
+        if nid not in self.nodes or not self.nodes[nid].alive:
+            return False
+        self.leader_id = nid
+        for nd in self.nodes.values():
+            nd.elected = nid
+            nd.participant = False
+        return True
+
     def reset_flags(self):
         for nd in self.nodes.values():
             nd.participant = False
@@ -88,6 +117,29 @@ class Ring:
 
     # ---------- full step trace (no sleeps; UI animates) ----------
     def election_trace(self, initiator: Optional[int] = None) -> dict:
+        t0 = time.perf_counter()
+        trace = self._election_trace(initiator)
+        elapsed = time.perf_counter() - t0
+        ELECTION_SECONDS.observe(elapsed)
+        if TRACER.enabled:
+            self._trace_election(initiator, trace, elapsed)
+        if trace.get("ok"):
+            ELECTION_HOPS.observe(sum(1 for st in trace["steps"] if st["type"] in ("hop", "coord")))
+        result = "ok" if trace.get("ok") else trace.get("reason")
+        ELECTIONS.get(result, ELECTIONS["failed"]).inc()
+        return trace
+
+    def _trace_election(self, initiator: Optional[int], trace: dict, elapsed: float):
+        sp = TRACER.record("ring.election", {"initiator": initiator, "ok": bool(trace.get("ok")),
+                                             "leader": trace.get("leaderId")}, elapsed)
+        if sp is None:
+            return
+        # the trace is computed in one go, so each hop is a logical span with no duration
+        for i, st in enumerate(trace.get("steps", ())):
+            if st["type"] in ("hop", "coord"):
+                TRACER.record(f"ring.{st['type']}", {"step": i, **st}, parent=sp)
+
+    def _election_trace(self, initiator: Optional[int] = None) -> dict:
         live = [i for i in self.order if self.nodes[i].alive]
         if not live:
             return {"ok": False, "reason": "no-alive-nodes"}
@@ -104,6 +156,7 @@ class Ring:
             P[start] = True
             steps.append({"type": "start", "who": start})
 
+        key = self._key
         j = start
         frm = start
         to = self.next_alive(frm)
@@ -116,7 +169,7 @@ class Ring:
             me = to
             myid = me
 
-            if j > myid:
+            if key(j) > key(myid):
                 was = P[me]
                 P[me] = True
                 steps.append({
@@ -131,7 +184,7 @@ class Ring:
                 if to is None: return {"ok": False, "reason": "ring-broken"}
                 continue
 
-            if j < myid:
+            if key(j) < key(myid):
                 if not P[me]:
                     P[me] = True
                     old = j
@@ -0,0 +1,137 @@
+# ring_codec.py
+from __future__ import annotations
+import base64
+import json
+import struct
+from dataclasses import dataclass
+from typing import List, Union
+
+# ---- wire formats ----
+WIRE_BINARY = "binary"
+WIRE_JSON = "json"
+SUPPORTED_WIRES = (WIRE_BINARY, WIRE_JSON)   # in order of preference
+
+# ---- message types ----
+MSG_DATA = 1
+MSG_ELECTION = 2
+MSG_COORDINATOR = 3
+MSG_HEARTBEAT = 4
+
+# Binary body layout (network byte order, 18 bytes + payload):
+#   magic u8 | version u8 | type u8 | flags u8 | origin u32 | seq u64 | hops u16 | payload...
+# The magic byte can never start a JSON document, so a receiver can tell the
+# two formats apart from the first byte of every frame.
+MAGIC = 0xA5
+VERSION = 1
+HEADER = struct.Struct("!BBBBIQH")
+
+Payload = Union[bytes, bytearray, memoryview]
+
+# A RingMessage on the JSON wire is {RING_KEY: {fields}}; the reserved key keeps
+# it apart from application dicts, which travel as-is
+RING_KEY = "__ring_msg__"
+
+
+class CodecError(ValueError):
+    pass
+
+
+@dataclass
+class RingMessage:
+    origin: int
+    type: int = MSG_DATA
+    seq: int = 0
+    hops: int = 0
+    flags: int = 0
+    payload: Payload = b""   # opaque to the ring; forwarded untouched
+
+    def forwarded(self) -> "RingMessage":
+        """Same message one hop further along; shares the payload buffer."""
+        return RingMessage(self.origin, self.type, self.seq, self.hops + 1, self.flags, self.payload)
+
+
+# -------- binary --------
+def encode_binary_parts(msg: RingMessage) -> List[Payload]:
+    """Header and payload as separate buffers, ready for writer.writelines()."""
+    header = HEADER.pack(MAGIC, VERSION, msg.type, msg.flags, msg.origin, msg.seq, msg.hops)
+    return [header, msg.payload] if len(msg.payload) else [header]
+
+
+def encode_binary(msg: RingMessage) -> bytes:
+    return b"".join(encode_binary_parts(msg))
+
+
+def decode_binary(body: Payload) -> RingMessage:
+    """Parse the fixed header; the payload comes back as a zero-copy memoryview."""
+    view = memoryview(body)
+    if len(view) < HEADER.size:
+        raise CodecError(f"short frame ({len(view)} bytes)")
+    magic, version, mtype, flags, origin, seq, hops = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise CodecError(f"bad magic 0x{magic:02x}")
+    if version != VERSION:
+        raise CodecError(f"unsupported version {version}")
+    return RingMessage(origin, mtype, seq, hops, flags, view[HEADER.size:])
+
+
+# -------- JSON fallback --------
+def encode_json(msg: Union[RingMessage, dict]) -> bytes:
+    if isinstance(msg, RingMessage):
+        msg = {RING_KEY: {
+            "v": VERSION,
+            "origin": msg.origin,
+            "type": msg.type,
+            "seq": msg.seq,
+            "hops": msg.hops,
+            "flags": msg.flags,
+            "payload_b64": base64.b64encode(msg.payload).decode("ascii"),
+        }}
+    return json.dumps(msg, separators=(",", ":")).encode()
+
+
+def decode_json(body: Payload) -> Union[RingMessage, dict]:
+    """Any malformed input raises CodecError, so a receiver can drop just that frame."""
+    try:
+        obj = json.loads(bytes(body))
+    except (ValueError, UnicodeDecodeError, RecursionError) as e:
+        raise CodecError(f"invalid JSON ({e})") from e
+    if not (isinstance(obj, dict) and RING_KEY in obj):
+        return obj
+    try:
+        fields = obj[RING_KEY]
+        return RingMessage(
+            int(fields["origin"]), int(fields.get("type", MSG_DATA)), int(fields.get("seq", 0)),
+            int(fields.get("hops", 0)), int(fields.get("flags", 0)),
+            base64.b64decode(fields["payload_b64"], validate=True),
+        )
+    except (KeyError, TypeError, ValueError, AttributeError) as e:   # binascii.Error is a ValueError
+        raise CodecError(f"malformed ring message ({type(e).__name__}: {e})") from e
+
+
+# -------- either --------
+def encode_parts(msg: Union[RingMessage, dict], wire: str) -> List[Payload]:
+    """
+    Plain dicts always travel as JSON; RingMessages use the negotiated wire.
+    Raises CodecError for anything that cannot be encoded (a non-JSON value,
+    a header field out of range such as hops > 65535, ...).
+    """
+    if not (isinstance(msg, RingMessage) and wire == WIRE_BINARY):
+        wire = WIRE_JSON
+    try:
+        return encode_binary_parts(msg) if wire == WIRE_BINARY else [encode_json(msg)]
+    except (TypeError, ValueError, OverflowError, struct.error) as e:
+        raise CodecError(f"cannot encode {type(msg).__name__} as {wire} ({e})") from e
+
+
+def decode(body: Payload) -> Union[RingMessage, dict]:
+    if len(body) and body[0] == MAGIC:
+        return decode_binary(body)
+    return decode_json(body)
+
+
+def choose_wire(offered) -> str:
+    """Pick the first wire format the peer offered that we also speak."""
+    for wire in offered or ():
+        if wire in SUPPORTED_WIRES:
+            return wire
+    return WIRE_JSON
@@ -0,0 +1,205 @@
+# sharded_paxos.py
+from __future__ import annotations
+import multiprocessing as mp
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from paxos import PaxosCluster
+
+
+def shard_for(key: str, groups: int) -> int:
+    """Stable key -> group mapping (same answer in every process and run)."""
+    return zlib.crc32(str(key).encode()) % groups
+
+
+# -------- worker process: one Paxos group --------
+def _group_worker(gid: int, names: List[str], q1: Optional[int], q2: Optional[int], conn) -> None:
+    cluster = PaxosCluster(names, phase1_quorum=q1, phase2_quorum=q2)
+    while True:
+        op, arg = conn.recv()
+        if op == "propose":
+            # arg: list of (command, proposer); each command gets its own slot
+            conn.send([cluster.propose(cmd, proposer=who) for cmd, who in arg])
+        elif op == "state":
+            conn.send(cluster.state())
+        elif op == "commit_index":
+            conn.send(cluster.commitIndex)
+        elif op == "crash":
+            conn.send(cluster.crash(arg))
+        elif op == "recover":
+            conn.send(cluster.recover(arg))
+        elif op == "stop":
+            conn.send(True)
+            conn.close()
+            return
+
+
+class ShardedPaxos:
+    """
+    N independent Paxos groups, each with its own log and leader, each in its
+    own worker process so commits scale across cores.
+    - commands are routed by key (e.g. package id or zone) with shard_for()
+    - leaders are spread over the DCs round-robin; a crashed leader is replaced
+      by the next live DC
+    - crash/recover of a DC applies to its acceptor in every group
+    - commit_vector()/merged_log() give the cross-group read path
+    """
+    def __init__(self, names: List[str], groups: int = 4,
+                 phase1_quorum: Optional[int] = None, phase2_quorum: Optional[int] = None):
+        if groups < 1:
+            raise ValueError("need at least one group")
+        PaxosCluster(names, phase1_quorum, phase2_quorum)   # validate config up front
+        self.names = list(names)
+        self.groups = groups
+        self.quorums = (phase1_quorum, phase2_quorum)
+        self.alive = {n: True for n in names}
+        self.leaders: Dict[int, str] = {g: names[g % len(names)] for g in range(groups)}
+        self._conns = []
+        self._procs = []
+        self._locks = [threading.Lock() for _ in range(groups)]
+
+    # -------- lifecycle --------
+    def start(self) -> "ShardedPaxos":
+        for g in range(self.groups):
+            parent, child = mp.Pipe()
+            proc = mp.Process(target=_group_worker, args=(g, self.names, *self.quorums, child),
+                              name=f"paxos-group-{g}", daemon=True)
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        return self
+
+    def stop(self) -> None:
+        for g in range(len(self._conns)):
+            try:
+                self._call(g, "stop")
+            except (EOFError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+        self._conns, self._procs = [], []
+
+    def terminate(self) -> None:
+        """Kill the worker processes without the stop handshake (e.g. a caller is stuck holding a group)."""
+        for proc in self._procs:
+            proc.terminate()
+        for proc in self._procs:
+            proc.join(timeout=5)
+        self._conns, self._procs = [], []
+
+    # -------- plumbing --------
+    def _call(self, g: int, op: str, arg=None):
+        with self._locks[g]:
+            self._conns[g].send((op, arg))
+            return self._conns[g].recv()
+
+    @contextmanager
+    def _all_groups(self):
+        """Hold every group lock, taken in ascending order like propose_many()."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def _broadcast_locked(self, op: str, arg=None) -> List:
+        """Send to every group first, then collect, so the groups work in parallel (caller holds _all_groups)."""
+        for conn in self._conns:
+            conn.send((op, arg))
+        return [conn.recv() for conn in self._conns]
+
+    def _broadcast(self, op: str, arg=None) -> List:
+        with self._all_groups():
+            return self._broadcast_locked(op, arg)
+
+    def group_of(self, key: str) -> int:
+        return shard_for(key, self.groups)
+
+    # -------- writes --------
+    def propose(self, key: str, command: str) -> dict:
+        g = self.group_of(key)
+        with self._locks[g]:
+            leader = self.leaders[g]
+            self._conns[g].send(("propose", [(command, leader)]))
+            res = self._conns[g].recv()[0]
+        return {"group": g, "leader": leader, **res}
+
+    def propose_many(self, items: Iterable[Tuple[str, str]]) -> List[dict]:
+        """Propose (key, command) pairs; one batch per group, all groups in parallel."""
+        items = list(items)
+        batches: Dict[int, List[int]] = {}
+        for i, (key, _) in enumerate(items):
+            batches.setdefault(self.group_of(key), []).append(i)
+        # group locks are always taken in ascending order (as _all_groups does),
+        # so concurrent propose_many/crash/recover/reads cannot deadlock
+        groups = sorted(batches)
+        for g in groups:
+            self._locks[g].acquire()
+        results: List[Optional[dict]] = [None] * len(items)
+        try:
+            for g, idxs in batches.items():
+                self._conns[g].send(("propose", [(items[i][1], self.leaders[g]) for i in idxs]))
+            for g, idxs in batches.items():
+                for i, res in zip(idxs, self._conns[g].recv()):
+                    results[i] = {"group": g, **res}
+        finally:
+            for g in groups:
+                self._locks[g].release()
+        return results
+
+    # -------- membership --------
+    # alive/leaders change only while every group lock is held, so a concurrent
+    # propose never reads a leader that its group already knows has crashed
+    def crash(self, name: str) -> bool:
+        if name not in self.alive:
+            return False
+        with self._all_groups():
+            self.alive[name] = False
+            self._broadcast_locked("crash", name)
+            live = [n for n in self.names if self.alive[n]]
+            for g, leader in self.leaders.items():
+                if leader == name and live:
+                    self.leaders[g] = live[g % len(live)]
+        return True
+
+    def recover(self, name: str) -> bool:
+        if name not in self.alive:
+            return False
+        with self._all_groups():
+            self.alive[name] = True
+            self._broadcast_locked("recover", name)
+        return True
+
+    # -------- cross-group reads --------
+    def commit_vector(self) -> Dict[int, int]:
+        """Commit index of every group, read together."""
+        return dict(enumerate(self._broadcast("commit_index")))
+
+    def merged_log(self) -> List[dict]:
+        """All groups' chosen entries, interleaved by slot then group."""
+        states = self._broadcast("state")
+        entries = [
+            {"group": g, "slot": slot, "value": value}
+            for g, st in enumerate(states) for slot, value in st["log"].items()
+        ]
+        entries.sort(key=lambda e: (e["slot"], e["group"]))
+        return entries
+
+    def state(self) -> dict:
+        with self._all_groups():
+            states = self._broadcast_locked("state")
+            leaders = dict(self.leaders)
+        return {
+            "groups": [
+                {"group": g, "leader": leaders[g], "commitIndex": st["commitIndex"],
+                 "quorums": st["quorums"]}
+                for g, st in enumerate(states)
+            ],
+            "commitVector": {g: st["commitIndex"] for g, st in enumerate(states)},
+            "totalCommits": sum(st["commitIndex"] for st in states),
+        }